@@ -0,0 +1,61 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Optional
+
+
+class MessageBatcher:
+    # Обработчик каждого сообщения ждёт, пока его пачка не будет записана: брокер
+    # подтверждает сообщения только после этого, то есть всей пачкой сразу
+    def __init__(
+            self,
+            flush: Callable[[list], Awaitable[Any]],
+            max_size: int,
+            max_wait_ms: float,
+            concurrency: int = 1,
+    ):
+        self.flush = flush
+        self.max_size = max_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending: list[tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushing: set[asyncio.Task] = set()
+        # Сколько пачек пишется одновременно
+        self._slots = asyncio.Semaphore(concurrency)
+
+    async def submit(self, item: Any) -> None:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_size:
+            self._flush_pending()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush_pending)
+        # Ошибка записи возвращается каждому обработчику пачки, и брокер вернёт их в очередь
+        await future
+
+    async def drain(self) -> None:
+        self._flush_pending()
+        if self._flushing:
+            await asyncio.gather(*self._flushing, return_exceptions=True)
+
+    def _flush_pending(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.create_task(self._write(batch))
+        self._flushing.add(task)
+        task.add_done_callback(self._flushing.discard)
+
+    async def _write(self, batch: list[tuple[Any, asyncio.Future]]) -> None:
+        async with self._slots:
+            try:
+                await self.flush([item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+        for _, future in batch:
+            if not future.done():
+                future.set_result(None)
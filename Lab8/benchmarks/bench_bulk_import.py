@@ -0,0 +1,68 @@
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from dto.product_create_dto import ProductCreate
+from models import Base
+from repositories.product_repository import ProductRepository
+from service.import_service import ImportService
+from service.product_service import ProductService
+
+PRODUCTS = 20_000
+
+
+def make_csv(count: int) -> bytes:
+    lines = ["name,description,price"]
+    lines.extend(f"product_{i},Описание товара {i},{i % 1000 + 0.99}" for i in range(count))
+    return "\n".join(lines).encode()
+
+
+async def chunks(data: bytes, size: int = 64 * 1024):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+async def make_session_factory(path: str):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine, sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def one_by_one(session_factory, count: int) -> None:
+    async with session_factory() as session:
+        product_service = ProductService(ProductRepository(session))
+        for i in range(count):
+            await product_service.create(ProductCreate(name=f"product_{i}", price=i % 1000 + 0.99))
+
+
+async def bulk(session_factory, data: bytes) -> None:
+    report = await ImportService(session_factory).import_products(chunks(data), "csv")
+    assert report.failed == 0
+
+
+async def main():
+    data = make_csv(PRODUCTS)
+    with tempfile.TemporaryDirectory() as directory:
+        # Поштучный вариант на десятой части строк, иначе ждать слишком долго
+        for name, count, run in (
+                ("ProductService.create", PRODUCTS // 10, lambda factory: one_by_one(factory, PRODUCTS // 10)),
+                ("ImportService (csv)", PRODUCTS, lambda factory: bulk(factory, data)),
+        ):
+            engine, session_factory = await make_session_factory(f"{directory}/{count}.db")
+            started = time.perf_counter()
+            await run(session_factory)
+            seconds = time.perf_counter() - started
+            await engine.dispose()
+            print(f"{name:>22}: {count / seconds:10.0f} rows/s ({count} rows in {seconds:.2f} s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from batching import MessageBatcher
+from db import build_engine, build_session_factory, build_writer_engine
+from models import Base
+from repositories.report_repository import ReportRepository
+from service.report_service import ReportService
+from settings import load_settings
+
+MESSAGES = int(os.getenv("BENCH_MESSAGES", "5000"))
+BATCH_SIZE = int(os.getenv("BENCH_BATCH_SIZE", "100"))
+BATCH_CONCURRENCY = int(os.getenv("BENCH_BATCH_CONCURRENCY", "2"))
+# Как в broker.py: prefetch с запасом на все одновременно пишущиеся пачки
+PREFETCH = BATCH_SIZE * BATCH_CONCURRENCY
+
+
+def order_messages(count: int) -> list[dict]:
+    now = datetime.now().isoformat()
+    return [{"id": str(uuid4()), "quantity": 1, "created_at": now} for _ in range(count)]
+
+
+async def deliver(messages: list[dict], handler) -> float:
+    # aiormq запускает обработчик каждого доставленного сообщения отдельной задачей,
+    # а RabbitMQ держит неподтверждёнными не больше prefetch сообщений
+    prefetch = asyncio.Semaphore(PREFETCH)
+
+    async def consume(message: dict) -> None:
+        try:
+            await handler(message)
+        finally:
+            prefetch.release()
+
+    started = time.perf_counter()
+    tasks = []
+    for message in messages:
+        await prefetch.acquire()
+        tasks.append(asyncio.create_task(consume(message)))
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - started
+
+
+async def run(path: str) -> None:
+    config = load_settings("dev").model_copy(update={"sqlite_high_throughput": True})
+    engine = build_engine(f"sqlite:///{path}", config, instrument=False)
+    writer_engine = build_writer_engine(engine, config)
+    session_factory = build_session_factory(engine, writer_engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async def record(orders: list[dict]) -> None:
+        async with session_factory() as session:
+            await ReportService(ReportRepository(session)).record_orders(orders)
+
+    async def per_message(order: dict) -> None:
+        await record([order])
+
+    batcher = MessageBatcher(record, max_size=BATCH_SIZE, max_wait_ms=50, concurrency=BATCH_CONCURRENCY)
+
+    try:
+        for name, handler in (("per message", per_message), ("batched", batcher.submit)):
+            seconds = await deliver(order_messages(MESSAGES), handler)
+            print(f"{name:>12}: {MESSAGES / seconds:8.0f} msg/s ({MESSAGES} messages in {seconds:.2f} s)")
+    finally:
+        await engine.dispose()
+        if writer_engine is not None:
+            await writer_engine.dispose()
+
+
+async def main():
+    print(f"batch_size={BATCH_SIZE} concurrency={BATCH_CONCURRENCY} prefetch={PREFETCH}")
+    with tempfile.TemporaryDirectory() as directory:
+        await run(f"{directory}/reports.db")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
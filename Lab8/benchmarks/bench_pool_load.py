@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from db import build_engine
+from settings import load_settings
+
+# Открытая модель нагрузки: запросы приходят с заданной частотой независимо от того,
+# успевает ли пул, - именно так ведёт себя трафик при всплеске
+BASE_RATE = int(os.getenv("BENCH_BASE_RATE", "40"))
+DURATION = float(os.getenv("BENCH_DURATION", "5"))
+# Сколько запрос держит соединение: запрос к БД плюс работа внутри транзакции
+HOLD_MS = float(os.getenv("BENCH_HOLD_MS", "20"))
+
+
+def sample(name: str, pool: str) -> float:
+    return REGISTRY.get_sample_value(name, {"pool": pool}) or 0.0
+
+
+async def request(engine, latencies: list[float], timeouts: list[int]) -> None:
+    started = time.perf_counter()
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await asyncio.sleep(HOLD_MS / 1000)
+    except PoolTimeoutError:
+        timeouts.append(1)
+        return
+    latencies.append(time.perf_counter() - started)
+
+
+async def run(engine, rate: int, capacity: int) -> None:
+    pool = engine.sync_engine.pool
+    wait_sum = sample("db_pool_checkout_wait_seconds_sum", pool.name)
+    wait_count = sample("db_pool_checkout_wait_seconds_count", pool.name)
+
+    latencies: list[float] = []
+    timeouts: list[int] = []
+    tasks = []
+    peak_checked_out = 0
+    started = time.perf_counter()
+    for i in range(int(rate * DURATION)):
+        # Догоняем расписание, если цикл событий отстал
+        delay = started + i / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(request(engine, latencies, timeouts)))
+        peak_checked_out = max(peak_checked_out, pool.checkedout())
+    await asyncio.gather(*tasks)
+
+    checkouts = sample("db_pool_checkout_wait_seconds_count", pool.name) - wait_count
+    mean_wait = (sample("db_pool_checkout_wait_seconds_sum", pool.name) - wait_sum) / max(checkouts, 1)
+    latencies.sort()
+    print(
+        f"{rate:>5} req/s: p50 {statistics.median(latencies) * 1000:7.1f} ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:7.1f} ms, "
+        f"mean checkout wait {mean_wait * 1000:6.1f} ms, "
+        f"peak checked out {peak_checked_out}/{capacity}, "
+        f"timeouts {len(timeouts)}"
+    )
+
+
+async def main():
+    logging.basicConfig(level=logging.WARNING, format="%(name)s: %(message)s")
+    config = load_settings("prod").model_copy(update={"db_pool_timeout": 2})
+    with tempfile.TemporaryDirectory() as directory:
+        # Без Postgres гоняем тот же пул с очередью поверх SQLite
+        url = os.getenv("DATABASE_URL") or f"sqlite:///{directory}/pool.db"
+        overrides = {}
+        if url.startswith("sqlite"):
+            config = config.model_copy(update={
+                "sqlite_high_throughput": True,
+                "sqlite_read_pool_size": config.db_pool_size,
+            })
+            overrides["max_overflow"] = config.db_max_overflow
+        engine = build_engine(url, config, **overrides)
+        print(f"pool_size={config.db_pool_size} max_overflow={config.db_max_overflow} "
+              f"pool_timeout={config.db_pool_timeout}s hold={HOLD_MS} ms")
+        try:
+            for rate in (BASE_RATE, BASE_RATE * 10):
+                await run(engine, rate, config.db_pool_size + config.db_max_overflow)
+        finally:
+            await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import pika
+from faststream.rabbit import RabbitBroker
+
+from publisher import Publisher
+from settings import settings
+
+# Нужен запущенный RabbitMQ: docker run -d -p 5672:5672 rabbitmq:3-management
+MESSAGES = int(os.getenv("BENCH_MESSAGES", "5000"))
+QUEUE = "bench_publisher"
+
+
+def publish_per_connection(count: int) -> None:
+    # Как старый producer.py: соединение, объявление очереди и закрытие на каждое сообщение
+    parameters = pika.URLParameters(settings.rabbitmq_url)
+    for n in range(count):
+        connection = pika.BlockingConnection(parameters)
+        channel = connection.channel()
+        channel.queue_declare(queue=QUEUE)
+        channel.basic_publish(
+            exchange="",
+            routing_key=QUEUE,
+            body=json.dumps({"n": n}),
+            properties=pika.BasicProperties(delivery_mode=2),
+        )
+        connection.close()
+
+
+async def publish_one_by_one(publisher: Publisher, count: int) -> None:
+    # Постоянное соединение, но каждое сообщение ждёт своего подтверждения
+    for n in range(count):
+        await publisher.publish(QUEUE, {"n": n})
+
+
+async def publish_batched(publisher: Publisher, count: int) -> None:
+    await publisher.publish_many(QUEUE, [{"n": n} for n in range(count)])
+
+
+def report(name: str, count: int, seconds: float) -> None:
+    print(f"{name:<28} {count:>6} messages {seconds:7.2f} s {count / seconds:9.0f} msg/s")
+
+
+async def main():
+    broker = RabbitBroker(settings.rabbitmq_url, logger=None)
+    publisher = Publisher(broker)
+    await publisher.start()
+    connection = await broker.connect()
+    channel = await connection.channel()
+    queue = await channel.declare_queue(QUEUE)
+    try:
+        # Старый способ на порядки медленнее, поэтому меряем его на меньшем объёме
+        count = max(MESSAGES // 10, 1)
+        started = time.perf_counter()
+        await asyncio.to_thread(publish_per_connection, count)
+        report("connection per message", count, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await publish_one_by_one(publisher, MESSAGES)
+        report("persistent, confirm each", MESSAGES, time.perf_counter() - started)
+
+        print(f"channels={publisher.channels} batch_size={publisher.batch_size}")
+        started = time.perf_counter()
+        await publish_batched(publisher, MESSAGES)
+        report("publish_many", MESSAGES, time.perf_counter() - started)
+    finally:
+        await queue.delete(if_unused=False, if_empty=False)
+        await channel.close()
+        await publisher.close()
+        await broker.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+import sys
+import timeit
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from uuid import UUID, uuid4
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from litestar.serialization import encode_json
+
+from dto.user_response import UserResponse
+from models import User
+
+ITEMS = 100
+ROUNDS = 2000
+
+
+# Прежний вариант ответа: dataclass, заполняемый поле за полем
+@dataclass
+class DataclassUserResponse:
+    id: UUID
+    username: str
+    email: str
+    description: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+
+
+def make_users(count: int) -> list[User]:
+    now = datetime.now()
+    return [
+        User(
+            id=uuid4(),
+            username=f"user_{i}",
+            email=f"user_{i}@example.com",
+            description="Постоянный клиент",
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def dataclass_response(users: list[User]) -> bytes:
+    return encode_json([
+        DataclassUserResponse(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            description=user.description,
+            created_at=user.created_at,
+            updated_at=user.updated_at
+        )
+        for user in users
+    ])
+
+
+def struct_response(users: list[User]) -> bytes:
+    return encode_json(UserResponse.from_models(users))
+
+
+def main():
+    users = make_users(ITEMS)
+    assert dataclass_response(users) == struct_response(users)
+
+    for name, func in (("dataclass", dataclass_response), ("msgspec.Struct", struct_response)):
+        seconds = min(timeit.repeat(lambda: func(users), number=ROUNDS, repeat=5))
+        print(f"{name:>15}: {seconds / ROUNDS * 1_000_000:8.1f} us per {ITEMS}-item response")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from litestar.serialization import encode_json
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from dto.user_response import UserResponse
+from fieldsets import to_sparse_list
+from models import Address, Base, Order, Product, User
+from repositories.user_repository import UserRepository
+
+USERS = 1000
+PAGE_SIZE = 100
+ROUNDS = 50
+FIELDS = ("id", "username")
+
+
+async def populate(session_factory):
+    async with session_factory() as session:
+        product = Product(name="Ноутбук", description="Игровой ноутбук", price=999.99)
+        session.add(product)
+        for i in range(USERS):
+            user = User(username=f"user_{i}", email=f"user_{i}@example.com", description="Постоянный клиент")
+            address = Address(user=user, street=f"{i} Main St", city="New York", state="NY",
+                              zip_code="10001", country="USA", is_primary=True)
+            session.add_all([user, address])
+            session.add_all([
+                Order(user=user, address=address, product=product, quantity=1, total_price=product.price)
+                for _ in range(3)
+            ])
+        await session.commit()
+
+
+async def measure(session_factory, fields):
+    elapsed = 0.0
+    payload = b""
+    for _ in range(ROUNDS):
+        async with session_factory() as session:
+            started = time.perf_counter()
+            users = await UserRepository(session).get_by_filter(PAGE_SIZE, 1, fields=fields)
+            if fields:
+                payload = encode_json(to_sparse_list(users, UserResponse, fields))
+            else:
+                payload = encode_json(UserResponse.from_models(users))
+            elapsed += time.perf_counter() - started
+    return elapsed / ROUNDS * 1000, len(payload)
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{directory}/bench.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        await populate(session_factory)
+
+        full_ms, full_bytes = await measure(session_factory, None)
+        sparse_ms, sparse_bytes = await measure(session_factory, FIELDS)
+        await engine.dispose()
+
+    print(f"full     : {full_ms:7.2f} ms, {full_bytes:7d} bytes per page of {PAGE_SIZE}")
+    print(f"fields={','.join(FIELDS)}: {sparse_ms:7.2f} ms, {sparse_bytes:7d} bytes per page of {PAGE_SIZE}")
+    print(f"payload -{(1 - sparse_bytes / full_bytes) * 100:.0f}%, time -{(1 - sparse_ms / full_ms) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,67 @@
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy.exc import OperationalError
+
+from db import build_engine, build_session_factory, build_writer_engine
+from dto.user_create_dto import UserCreate
+from models import Base
+from repositories.user_repository import UserRepository
+from settings import load_settings
+
+WRITERS = 32
+TRANSACTIONS_PER_WRITER = 25
+
+
+async def writer_task(session_factory, writer: int, errors: list[str]) -> None:
+    for i in range(TRANSACTIONS_PER_WRITER):
+        try:
+            async with session_factory() as session:
+                # Типичная транзакция API: прочитать, затем записать
+                await UserRepository(session).get_by_filter(10, 1)
+                await UserRepository(session).create(
+                    UserCreate(username=f"user_{writer}_{i}", email=f"user_{writer}_{i}@example.com")
+                )
+                await session.commit()
+        except OperationalError as e:
+            errors.append(str(e.orig))
+
+
+async def run(path: str, high_throughput: bool) -> None:
+    config = load_settings("dev").model_copy(update={"sqlite_high_throughput": high_throughput})
+    engine = build_engine(f"sqlite:///{path}", config, instrument=False)
+    writer_engine = build_writer_engine(engine, config)
+    session_factory = build_session_factory(engine, writer_engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    errors: list[str] = []
+    started = time.perf_counter()
+    await asyncio.gather(*(writer_task(session_factory, writer, errors) for writer in range(WRITERS)))
+    seconds = time.perf_counter() - started
+
+    await engine.dispose()
+    if writer_engine is not None:
+        await writer_engine.dispose()
+
+    total = WRITERS * TRANSACTIONS_PER_WRITER
+    committed = total - len(errors)
+    name = "WAL + single writer" if high_throughput else "default journal"
+    print(f"{name:>20}: {committed / seconds:8.0f} commits/s, {len(errors)} errors ({total} transactions in {seconds:.2f} s)")
+    if errors:
+        print(f"{'':>22}first error: {errors[0]}")
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as directory:
+        await run(f"{directory}/default.db", high_throughput=False)
+        await run(f"{directory}/wal.db", high_throughput=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+ROUNDS = 5
+DB_PATH = Path(tempfile.gettempdir()) / "bench_startup.db"
+
+# Без RabbitMQ и Redis под рукой их прогрев отключается, пул БД прогревается всегда
+ENV = {
+    # Окружение идёт первым: seed.py --reset пересоздаёт таблицы, поэтому
+    # DATABASE_URL из оболочки не должен перебить временную базу бенчмарка
+    **os.environ,
+    "DATABASE_URL": f"sqlite+aiosqlite:///{DB_PATH}",
+    "BROKER_ENABLED": "0",
+    "REDIS_URL": "",
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def import_time() -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import main"], cwd=APP_DIR, env=ENV, check=True)
+    return time.perf_counter() - started
+
+
+def timed_get(url: str) -> float:
+    started = time.perf_counter()
+    urllib.request.urlopen(url, timeout=5).read()
+    return time.perf_counter() - started
+
+
+def run_server(timeout: float = 30) -> dict[str, float]:
+    # От запуска процесса до первого ответа: импорт, lifespan с прогревом и bind порта
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=APP_DIR,
+        env=ENV,
+    )
+    try:
+        while True:
+            if time.perf_counter() - started > timeout:
+                raise TimeoutError("server did not become ready")
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=1).read()
+                break
+            except OSError:
+                time.sleep(0.01)
+        ready = time.perf_counter() - started
+        return {
+            "time to first response": ready,
+            "first GET /users": timed_get(f"http://127.0.0.1:{port}/users"),
+            "second GET /users": timed_get(f"http://127.0.0.1:{port}/users"),
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def report(name: str, samples: list[float]) -> None:
+    print(f"{name:>22}: median {statistics.median(samples) * 1000:7.1f} ms, max {max(samples) * 1000:7.1f} ms")
+
+
+def main():
+    subprocess.run([sys.executable, "seed.py", "--reset"], cwd=APP_DIR, env=ENV, check=True, capture_output=True)
+
+    report("import main", [import_time() for _ in range(ROUNDS)])
+    runs = [run_server() for _ in range(ROUNDS)]
+    for name in runs[0]:
+        report(name, [run[name] for run in runs])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import asyncio
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+import httpx
+
+APP_DIR = Path(__file__).resolve().parent.parent
+DB_PATH = Path(tempfile.gettempdir()) / "bench_workers.db"
+DURATION = float(os.getenv("BENCH_DURATION", "10"))
+CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", "64"))
+# Генератор нагрузки сам написан на Python, поэтому тоже раскладывается по процессам
+CLIENT_PROCESSES = int(os.getenv("BENCH_CLIENTS", str(max((os.cpu_count() or 1) // 2, 1))))
+
+ENV = {
+    **os.environ,
+    "DATABASE_URL": f"sqlite+aiosqlite:///{DB_PATH}",
+    "BROKER_ENABLED": "0",
+    "REDIS_URL": "",
+    "SERVER_TIMING_ENABLED": "0",
+    "TRACE_SAMPLE_RATE": "0",
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def hammer(url: str, concurrency: int, duration: float) -> int:
+    done = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits) as client:
+        async def worker():
+            nonlocal done
+            while time.perf_counter() < deadline:
+                response = await client.get(url)
+                response.raise_for_status()
+                done += 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return done
+
+
+def client_process(url: str, concurrency: int, duration: float) -> int:
+    return asyncio.run(hammer(url, concurrency, duration))
+
+
+def measure(workers: int) -> float:
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "serve.py"],
+        cwd=APP_DIR,
+        env={**ENV, "WEB_WORKERS": str(workers), "WEB_PORT": str(port), "WEB_HOST": "127.0.0.1"},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}/users"
+    try:
+        started = time.perf_counter()
+        while True:
+            if time.perf_counter() - started > 60:
+                raise TimeoutError("server did not become ready")
+            try:
+                urllib.request.urlopen(url, timeout=1).read()
+                break
+            except OSError:
+                time.sleep(0.05)
+        # Даём подняться остальным воркерам
+        time.sleep(1)
+
+        per_client = max(CONCURRENCY // CLIENT_PROCESSES, 1)
+        with multiprocessing.Pool(CLIENT_PROCESSES) as pool:
+            counts = pool.starmap(client_process, [(url, per_client, DURATION)] * CLIENT_PROCESSES)
+        return sum(counts) / DURATION
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    subprocess.run([sys.executable, "seed.py", "--reset"], cwd=APP_DIR, env=ENV, check=True, capture_output=True)
+
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, cores // 2, cores} - {0})
+    baseline = None
+    for workers in worker_counts:
+        rps = measure(workers)
+        baseline = baseline or rps
+        print(f"{workers:>3} workers: {rps:9.0f} req/s  (x{rps / baseline:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+from datetime import timezone
+from time import perf_counter, time
+
+from faststream import BaseMiddleware, FastStream
+from faststream.rabbit import Channel, RabbitBroker
+
+from batching import MessageBatcher
+from db import async_session_factory
+from metrics import BROKER_CONSUMER_LAG, BROKER_MESSAGE_DURATION
+from models import Product
+from publisher import Publisher
+from repositories.report_repository import ReportRepository
+from service.report_service import ReportService
+from settings import settings
+from tracing import traced
+
+
+class BrokerMetricsMiddleware(BaseMiddleware):
+    async def consume_scope(self, call_next, msg):
+        raw_message = msg.raw_message
+        queue = getattr(raw_message, "routing_key", None) or "unknown"
+
+        published_at = getattr(raw_message, "timestamp", None)
+        if published_at is not None:
+            if published_at.tzinfo is None:
+                published_at = published_at.replace(tzinfo=timezone.utc)
+            BROKER_CONSUMER_LAG.labels(queue).observe(max(time() - published_at.timestamp(), 0.0))
+
+        started = perf_counter()
+        status = "ok"
+        try:
+            return await super().consume_scope(call_next, msg)
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            BROKER_MESSAGE_DURATION.labels(queue, status).observe(perf_counter() - started)
+
+
+broker = RabbitBroker(
+    settings.rabbitmq_url,
+    max_consumers=settings.broker_prefetch,
+    middlewares=[BrokerMetricsMiddleware],
+)
+
+publisher = Publisher(broker)
+
+stream_app = FastStream(broker)
+
+
+async def record_order_batch(orders: list[dict]) -> None:
+    async with async_session_factory() as session:
+        await ReportService(ReportRepository(session)).record_orders(orders)
+
+
+order_batcher = MessageBatcher(
+    record_order_batch,
+    max_size=settings.order_batch_size,
+    max_wait_ms=settings.order_batch_max_wait_ms,
+    concurrency=settings.order_batch_concurrency,
+)
+
+
+# Меньший prefetch не даст пачке набраться: она уходила бы только по таймеру
+@broker.subscriber(
+    "order",
+    channel=Channel(
+        prefetch_count=settings.order_consumer_prefetch
+        or settings.order_batch_size * settings.order_batch_concurrency
+    ),
+    retry=True,
+)
+@traced(kind="consumer")
+async def consume_order(order: dict):
+    await order_batcher.submit(order)
+
+@broker.subscriber("product")
+@traced(kind="consumer")
+async def subscribe_product(product: Product):
+    print(f"Получен продукт: {product}")
+
+
+async def start_broker():
+    await broker.start()
+    await publisher.start()
+
+
+async def stop_broker():
+    # Дописываем набранные пачки, пока канал открыт и их ещё можно подтвердить
+    await order_batcher.drain()
+    await publisher.close()
+    await broker.close()
@@ -0,0 +1,64 @@
+import asyncio
+from functools import partial
+from typing import Awaitable, Callable, Hashable, TypeVar
+from uuid import UUID
+
+from metrics import COALESCED_REQUESTS
+from settings import settings
+
+REQUEST_COALESCING = settings.request_coalescing
+
+T = TypeVar("T")
+
+
+def _normalize(value):
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, str):
+        try:
+            return str(UUID(value))
+        except ValueError:
+            return value
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _normalize(item)) for key, item in value.items() if item is not None))
+    return value
+
+
+def coalescing_key(route: str, **params) -> Hashable:
+    # Один и тот же id в разном написании и порядок фильтров не должны давать разные ключи
+    return route, _normalize(params)
+
+
+# Общий результат живёт только пока запрос в полёте: это не кэш, а защита
+# от одинаковых запросов, пришедших одновременно в один воркер
+class RequestCoalescer:
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: dict[Hashable, asyncio.Task] = {}
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        if not REQUEST_COALESCING:
+            return await factory()
+
+        task = self._in_flight.get(key)
+        if task is None:
+            COALESCED_REQUESTS.labels(self.name, "leader").inc()
+            task = asyncio.ensure_future(factory())
+            self._in_flight[key] = task
+            task.add_done_callback(partial(self._done, key))
+        else:
+            COALESCED_REQUESTS.labels(self.name, "shared").inc()
+
+        # Отключившийся клиент отменяет только своё ожидание, а не общий запрос
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
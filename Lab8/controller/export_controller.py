@@ -0,0 +1,57 @@
+from datetime import datetime
+from typing import Optional
+
+from litestar import Controller, get
+from litestar.exceptions import ValidationException
+from litestar.params import Parameter
+from litestar.response import Stream
+
+from service.export_service import ExportService
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class ExportController(Controller):
+    path = "/exports"
+
+    @staticmethod
+    def _ndjson_stream(body, compress: bool) -> Stream:
+        headers = {"Vary": "Accept-Encoding"}
+        if compress:
+            headers["Content-Encoding"] = "gzip"
+        return Stream(body, media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+    @staticmethod
+    def _check_range(created_from: Optional[datetime], created_to: Optional[datetime]) -> None:
+        if created_from and created_to and created_from >= created_to:
+            raise ValidationException(detail="created_from must be earlier than created_to")
+
+    @staticmethod
+    def _wants_gzip(accept_encoding: Optional[str]) -> bool:
+        return bool(accept_encoding) and "gzip" in accept_encoding.lower()
+
+    @get("/orders.ndjson")
+    async def export_orders(
+            self,
+            export_service: ExportService,
+            created_from: Optional[datetime] = None,
+            created_to: Optional[datetime] = None,
+            accept_encoding: Optional[str] = Parameter(header="Accept-Encoding", default=None),
+    ) -> Stream:
+        self._check_range(created_from, created_to)
+        compress = self._wants_gzip(accept_encoding)
+        body = export_service.orders_ndjson(created_from, created_to, compress)
+        return self._ndjson_stream(body, compress)
+
+    @get("/users.ndjson")
+    async def export_users(
+            self,
+            export_service: ExportService,
+            created_from: Optional[datetime] = None,
+            created_to: Optional[datetime] = None,
+            accept_encoding: Optional[str] = Parameter(header="Accept-Encoding", default=None),
+    ) -> Stream:
+        self._check_range(created_from, created_to)
+        compress = self._wants_gzip(accept_encoding)
+        body = export_service.users_ndjson(created_from, created_to, compress)
+        return self._ndjson_stream(body, compress)
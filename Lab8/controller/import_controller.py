@@ -0,0 +1,65 @@
+from typing import AsyncIterator, Optional
+
+from litestar import Controller, Request, post
+from litestar.datastructures import UploadFile
+from litestar.exceptions import ValidationException
+
+from dto.import_report_dto import ImportReport
+from service.import_service import IMPORT_FORMATS, ImportService
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+FORMATS_BY_MEDIA_TYPE = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+}
+
+
+async def _read_upload(upload: UploadFile) -> AsyncIterator[bytes]:
+    while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+        yield chunk
+
+
+class ImportController(Controller):
+    path = "/imports"
+
+    @staticmethod
+    async def _source(request: Request, format: Optional[str]) -> tuple[AsyncIterator[bytes], str]:
+        media_type = request.headers.get("Content-Type", "").split(";")[0].strip().lower()
+
+        if media_type == "multipart/form-data":
+            # Litestar разбирает multipart целиком в памяти, поэтому большие файлы
+            # лучше отправлять телом запроса с Content-Type: text/csv или application/x-ndjson
+            form = await request.form()
+            upload = form.get("file")
+            if not isinstance(upload, UploadFile):
+                raise ValidationException(detail="Multipart upload must contain a 'file' field")
+            format = format or upload.filename.rsplit(".", 1)[-1].lower()
+            source = _read_upload(upload)
+        else:
+            format = format or FORMATS_BY_MEDIA_TYPE.get(media_type)
+            source = request.stream()
+
+        if format not in IMPORT_FORMATS:
+            raise ValidationException(detail=f"Format must be one of: {', '.join(IMPORT_FORMATS)}")
+        return source, format
+
+    @post("/products", status_code=200)
+    async def import_products(
+            self,
+            request: Request,
+            import_service: ImportService,
+            format: Optional[str] = None,
+    ) -> ImportReport:
+        source, format = await self._source(request, format)
+        return await import_service.import_products(source, format)
+
+    @post("/users", status_code=200)
+    async def import_users(
+            self,
+            request: Request,
+            import_service: ImportService,
+            format: Optional[str] = None,
+    ) -> ImportReport:
+        source, format = await self._source(request, format)
+        return await import_service.import_users(source, format)
@@ -0,0 +1,12 @@
+from litestar import Controller, Response, get
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from metrics import collect_metrics
+
+
+class MetricsController(Controller):
+    path = "/metrics"
+
+    @get(include_in_schema=False, sync_to_thread=False)
+    def get_metrics(self) -> Response[bytes]:
+        return Response(collect_metrics(), media_type=CONTENT_TYPE_LATEST)
@@ -1,82 +1,162 @@
-from typing import List, Optional
+from typing import List, Optional, Union
 from uuid import UUID
-from litestar import Controller, get, post, put, delete
+from litestar import Controller, Response, get, post, put, delete
 from litestar.di import Provide
 from litestar.params import Parameter
-from litestar.exceptions import NotFoundException
+from litestar.exceptions import NotFoundException, ValidationException
 
+from coalescing import RequestCoalescer, coalescing_key
+from db import async_session_factory
+from dto.user_batch_dto import UserBatchResponse, UserIdsRequest
 from dto.user_create_dto import UserCreate
 from dto.user_response import UserResponse
 from dto.user_update_dto import UserUpdate
+from etag import etag_matches, etag_variant, make_etag, not_modified, user_version_stamps
+from fieldsets import USER_FIELDS, parse_fields, to_sparse, to_sparse_list
+from repositories.user_repository import UserRepository
 from service.user_service import UserService
+from tracing import traced
+
+MAX_IDS_PER_GET = 100
+MAX_IDS_PER_POST = 1000
+DEFAULT_PAGE_SIZE = 10
+
+user_reads = RequestCoalescer("users")
+
+
+async def read_users(method: str, *args, **kwargs):
+    # Общее чтение переживает отмену запроса-лидера (asyncio.shield), поэтому идёт
+    # через свою сессию: сессию лидера provide_db_session закроет при отмене
+    async with async_session_factory() as session:
+        user_service = UserService(UserRepository(session))
+        return await getattr(user_service, method)(*args, **kwargs)
+
 
 class UserController(Controller):
     path = "/users"
-    dependencies = {"user_service": Provide(UserService)}
+    dependencies = {"user_service": Provide(UserService, sync_to_thread=False)}
+
+    async def _get_users_by_ids(
+            self,
+            user_service: UserService,
+            ids: List[str],
+            limit: int,
+            fields: Optional[tuple[str, ...]] = None,
+    ) -> tuple[list, list[str]]:
+        if len(ids) > limit:
+            raise ValidationException(detail=f"At most {limit} ids can be requested at once")
+
+        users, not_found = await user_service.get_by_ids(ids, fields=fields)
+        return users, not_found
 
     @get("/{user_id:str}")
+    @traced(kind="server")
     async def get_user_by_id(
             self,
-            user_service: UserService,
             user_id: str,
-    ) -> UserResponse:
-        user = await user_service.get_by_id(user_id)
+            fields: Optional[str] = None,
+            if_none_match: Optional[str] = Parameter(header="If-None-Match", default=None),
+    ) -> Response[UserResponse]:
+        selected_fields = parse_fields(fields, USER_FIELDS)
+
+        cached_etag = user_version_stamps.get(user_id)
+        if cached_etag:
+            etag = etag_variant(cached_etag, selected_fields)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+
+        user = await user_reads.run(
+            coalescing_key("GET /users/{user_id}", user_id=user_id, fields=selected_fields),
+            lambda: read_users("get_by_id", user_id, fields=selected_fields),
+        )
         if not user:
             raise NotFoundException(detail=f"User with ID {user_id} not found")
-        return UserResponse(
-            id=user.id,
-            username=user.username,
-            email=user.email,
-            description=user.description,
-            created_at=user.created_at,
-            updated_at=user.updated_at
-        )
+
+        stamp = make_etag([user])
+        user_version_stamps.set(user_id, stamp)
+        etag = etag_variant(stamp, selected_fields)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+        if selected_fields:
+            return Response(to_sparse(user, UserResponse, selected_fields), headers={"ETag": etag})
+        return Response(UserResponse.from_model(user), headers={"ETag": etag})
 
     @get()
+    @traced(kind="server")
     async def get_all_users(
             self,
             user_service: UserService,
-            count: int = Parameter(gt=0, le=100, default=10),
-            page: int = Parameter(gt=0, default=1),
+            count: Optional[int] = Parameter(gt=0, le=100, default=None),
+            page: Optional[int] = Parameter(gt=0, default=None),
             username: Optional[str] = None,
             email: Optional[str] = None,
-    ) -> List[UserResponse]:
+            ids: Optional[str] = None,
+            fields: Optional[str] = None,
+            if_none_match: Optional[str] = Parameter(header="If-None-Match", default=None),
+    ) -> Response[Union[List[UserResponse], UserBatchResponse]]:
+        selected_fields = parse_fields(fields, USER_FIELDS)
+
+        if ids is not None:
+            # ids выбирает конкретных пользователей: пагинация и фильтры к ним неприменимы
+            if any(value is not None for value in (count, page, username, email)):
+                raise ValidationException(detail="ids cannot be combined with count, page, username or email")
+            id_list = [user_id.strip() for user_id in ids.split(",") if user_id.strip()]
+            users, not_found = await self._get_users_by_ids(
+                user_service, id_list, MAX_IDS_PER_GET, selected_fields
+            )
+            etag = etag_variant(make_etag(users), selected_fields)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+            if selected_fields:
+                batch = {"users": to_sparse_list(users, UserResponse, selected_fields), "not_found": not_found}
+                return Response(batch, headers={"ETag": etag})
+            batch = UserBatchResponse(users=UserResponse.from_models(users), not_found=not_found)
+            return Response(batch, headers={"ETag": etag})
+
+        count = count or DEFAULT_PAGE_SIZE
+        page = page or 1
+
         filters = {}
         if username:
             filters["username"] = username
         if email:
             filters["email"] = email
 
-        users = await user_service.get_by_filter(count, page, **filters)
-        return [
-            UserResponse(
-                id=user.id,
-                username=user.username,
-                email=user.email,
-                description=user.description,
-                created_at=user.created_at,
-                updated_at=user.updated_at
-            )
-            for user in users
-        ]
+        users = await user_reads.run(
+            coalescing_key("GET /users", count=count, page=page, fields=selected_fields, **filters),
+            lambda: read_users("get_by_filter", count, page, fields=selected_fields, **filters),
+        )
+        etag = etag_variant(make_etag(users), selected_fields)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+        if selected_fields:
+            return Response(to_sparse_list(users, UserResponse, selected_fields), headers={"ETag": etag})
+        return Response(UserResponse.from_models(users), headers={"ETag": etag})
+
+    @post("/batch", status_code=200)
+    @traced(kind="server")
+    async def get_users_batch(
+            self,
+            user_service: UserService,
+            data: UserIdsRequest,
+    ) -> UserBatchResponse:
+        users, not_found = await self._get_users_by_ids(user_service, data.ids, MAX_IDS_PER_POST)
+        return UserBatchResponse(users=UserResponse.from_models(users), not_found=not_found)
 
     @post()
+    @traced(kind="server")
     async def create_user(
             self,
             user_service: UserService,
             user_data: UserCreate,
     ) -> UserResponse:
         user = await user_service.create(user_data)
-        return UserResponse(
-            id=user.id,
-            username=user.username,
-            email=user.email,
-            description=user.description,
-            created_at=user.created_at,
-            updated_at=user.updated_at
-        )
+        return UserResponse.from_model(user)
 
     @delete("/{user_id:str}")
+    @traced(kind="server")
     async def delete_user(
             self,
             user_service: UserService,
@@ -85,6 +165,7 @@ class UserController(Controller):
         await user_service.delete(user_id)
 
     @put("/{user_id:str}")
+    @traced(kind="server")
     async def update_user(
             self,
             user_service: UserService,
@@ -94,11 +175,4 @@ class UserController(Controller):
         user = await user_service.update(user_id, user_data)
         if not user:
             raise NotFoundException(detail=f"User with ID {user_id} not found")
-        return UserResponse(
-            id=user.id,
-            username=user.username,
-            email=user.email,
-            description=user.description,
-            created_at=user.created_at,
-            updated_at=user.updated_at
-        )
\ No newline at end of file
+        return UserResponse.from_model(user)
\ No newline at end of file
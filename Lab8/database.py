@@ -1,6 +0,0 @@
-from sqlalchemy import create_engine
-
-engine = create_engine(
-    "sqlite:///app.db",
-    echo=True  # Логирование SQL-запросов
-)
\ No newline at end of file
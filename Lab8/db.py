@@ -0,0 +1,184 @@
+from typing import Optional
+
+from sqlalchemy import Delete, Insert, Select, Update, event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from deadline import remaining_ms
+from metrics import InstrumentedAsyncAdaptedQueuePool, instrument_engine
+from query_tracker import install_query_tracking
+from server_timing import install_db_timing
+from settings import Settings, settings
+from slow_query_log import install_slow_query_log
+
+
+def normalize_database_url(url: str) -> str:
+    # Синхронные URL из старых конфигов переводим на async-драйверы
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
+
+
+def build_engine_options(config: Settings, url: Optional[str] = None) -> dict:
+    url = normalize_database_url(url or config.database_url)
+    if url.startswith("sqlite"):
+        if config.sqlite_high_throughput and ":memory:" not in url:
+            # Держим соединения открытыми, иначе mmap и кэш страниц теряются на каждом запросе
+            return {
+                "poolclass": InstrumentedAsyncAdaptedQueuePool,
+                "pool_size": config.sqlite_read_pool_size,
+                "max_overflow": 0,
+                "pool_timeout": config.db_pool_timeout,
+            }
+        # У aiosqlite по умолчанию NullPool, ожидание соединения меряем только для пула с очередью
+        return {}
+
+    options = {
+        "poolclass": InstrumentedAsyncAdaptedQueuePool,
+        "pool_size": config.db_pool_size,
+        "max_overflow": config.db_max_overflow,
+        "pool_timeout": config.db_pool_timeout,
+        "pool_recycle": config.db_pool_recycle,
+        "pool_pre_ping": config.db_pool_pre_ping,
+    }
+    if url.startswith("postgresql+asyncpg"):
+        # Кэш prepared statements живёт на каждом соединении пула
+        connect_args = {"prepared_statement_cache_size": config.db_statement_cache_size}
+        if config.db_statement_timeout_ms:
+            connect_args["server_settings"] = {"statement_timeout": str(config.db_statement_timeout_ms)}
+        options["connect_args"] = connect_args
+    return options
+
+
+def install_sqlite_pragmas(engine: AsyncEngine, pragmas: dict) -> None:
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def sqlite_pragmas(config: Settings) -> dict:
+    pragmas = {"busy_timeout": config.sqlite_busy_timeout_ms}
+    if config.sqlite_high_throughput:
+        # В WAL читатели не блокируют писателя, а NORMAL синхронизирует диск только
+        # на чекпойнте: после сбоя питания теряются последние коммиты, но не целостность
+        pragmas.update({
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "mmap_size": config.sqlite_mmap_size,
+            # Отрицательное значение - размер в КиБ, а не в страницах
+            "cache_size": -config.sqlite_cache_size_kb,
+            "temp_store": "MEMORY",
+        })
+    return pragmas
+
+
+def build_engine(
+        url: Optional[str] = None,
+        config: Settings = settings,
+        instrument: bool = True,
+        **overrides,
+) -> AsyncEngine:
+    url = normalize_database_url(url or config.database_url)
+    options = {"echo": config.sql_echo, **build_engine_options(config, url), **overrides}
+    db_engine = create_async_engine(url, **options)
+
+    if db_engine.dialect.name == "sqlite":
+        install_sqlite_pragmas(db_engine, sqlite_pragmas(config))
+
+    if instrument:
+        install_db_timing(db_engine)
+        instrument_engine(db_engine)
+        install_query_tracking(db_engine)
+        install_slow_query_log(db_engine)
+    return db_engine
+
+
+def build_writer_engine(db_engine: AsyncEngine, config: Settings = settings) -> Optional[AsyncEngine]:
+    # SQLite допускает одного писателя на файл: вместо "database is locked" при
+    # конкурентных транзакциях записи ждут своей очереди за единственным соединением
+    if db_engine.dialect.name != "sqlite" or not config.sqlite_high_throughput:
+        return None
+    if db_engine.url.database in (None, "", ":memory:"):
+        return None
+    return build_engine(
+        db_engine.url.render_as_string(hide_password=False),
+        config,
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        pool_logging_name="writer",
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=config.sqlite_writer_timeout,
+    )
+
+
+class RoutingSession(Session):
+    # Чтения расходятся по пулу читателей, запись и всё, что после неё в той же
+    # транзакции, идёт через соединение писателя, чтобы видеть свои же изменения
+    def __init__(self, *args, reader: AsyncEngine, writer: AsyncEngine, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.reader = reader.sync_engine
+        self.writer = writer.sync_engine
+        self.writing = False
+
+    def get_bind(self, mapper=None, *, clause=None, **kwargs):
+        if self._flushing or isinstance(clause, (Insert, Update, Delete)):
+            self.writing = True
+        elif isinstance(clause, Select) and clause._for_update_arg is not None:
+            # SELECT ... FOR UPDATE читает строки под запись в той же транзакции
+            self.writing = True
+        return self.writer if self.writing else self.reader
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _reset_routing(session: RoutingSession, transaction) -> None:
+    if transaction.parent is None:
+        session.writing = False
+
+
+@event.listens_for(Session, "after_begin")
+def _mark_connection_used(session: Session, transaction, connection) -> None:
+    # Срабатывает, только когда сессия реально взяла соединение из пула
+    session.info["connection_used"] = True
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_request_deadline(session: Session, transaction, connection) -> None:
+    # Запрос не переживёт дедлайн HTTP-запроса: SET LOCAL действует до конца транзакции
+    timeout_ms = remaining_ms()
+    if timeout_ms is not None and connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {max(int(timeout_ms), 1)}")
+
+
+def session_used_connection(session: AsyncSession) -> bool:
+    return session.info.get("connection_used", False)
+
+
+def build_session_factory(db_engine: AsyncEngine, writer: Optional[AsyncEngine] = None) -> sessionmaker:
+    if writer is None:
+        return sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+    return sessionmaker(
+        class_=AsyncSession,
+        sync_session_class=RoutingSession,
+        expire_on_commit=False,
+        reader=db_engine,
+        writer=writer,
+    )
+
+
+# Общие для приложения, планировщика, сида и CLI: один пул на процесс
+engine = build_engine()
+writer_engine = build_writer_engine(engine)
+async_session_factory = build_session_factory(engine, writer_engine)
+
+
+async def dispose_engines() -> None:
+    await engine.dispose()
+    if writer_engine is not None:
+        await writer_engine.dispose()
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+from contextvars import ContextVar
+from dataclasses import dataclass
+from time import monotonic
+from typing import Optional
+
+import msgspec
+from litestar import Request, Response
+from litestar.exceptions import HTTPException, InternalServerException
+from litestar.exceptions.responses import create_exception_response
+from litestar.middleware.base import MiddlewareProtocol
+from litestar.types import ASGIApp, Message, Receive, Scope, Send
+from sqlalchemy.exc import DBAPIError
+
+from settings import settings
+
+REQUEST_DEADLINE_MS = settings.request_deadline_ms
+DEADLINE_HEADER = b"x-request-deadline"
+# SQLSTATE query_canceled: сработал statement_timeout или запрос отменили
+QUERY_CANCELED = "57014"
+
+logger = logging.getLogger("deadline")
+
+
+@dataclass
+class RequestDeadline:
+    expires_at: Optional[float]
+
+
+_current_deadline: ContextVar[Optional[RequestDeadline]] = ContextVar("request_deadline", default=None)
+
+
+def remaining_ms() -> Optional[float]:
+    deadline = _current_deadline.get()
+    if deadline is None or deadline.expires_at is None:
+        return None
+    return (deadline.expires_at - monotonic()) * 1000
+
+
+def request_budget_ms(header: Optional[bytes], default_ms: float = REQUEST_DEADLINE_MS) -> Optional[float]:
+    # Заголовок может только сократить настроенный бюджет, но не продлить его
+    budget = default_ms or None
+    if header:
+        try:
+            requested = float(header)
+        except ValueError:
+            requested = 0
+        if requested > 0:
+            budget = requested if budget is None else min(budget, requested)
+    return budget
+
+
+async def send_deadline_exceeded(send: Send) -> None:
+    body = msgspec.json.encode({"status_code": 504, "detail": "Request deadline exceeded"})
+    await send({
+        "type": "http.response.start",
+        "status": 504,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class DeadlineMiddleware(MiddlewareProtocol):
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        budget_ms = request_budget_ms(dict(scope["headers"]).get(DEADLINE_HEADER))
+        if budget_ms is None:
+            await self.app(scope, receive, send)
+            return
+
+        deadline = RequestDeadline(expires_at=monotonic() + budget_ms / 1000)
+        timeout = asyncio.timeout(budget_ms / 1000)
+        response_started = False
+
+        async def send_before_deadline(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                # Дедлайн ограничивает время до первого байта: потоковую выгрузку не обрываем
+                response_started = True
+                deadline.expires_at = None
+                timeout.reschedule(None)
+            await send(message)
+
+        token = _current_deadline.set(deadline)
+        try:
+            # Отмена по таймауту закрывает сессию через provide_db_session и возвращает
+            # соединение в пул, а asyncpg при отмене шлёт серверу cancel запроса
+            async with timeout:
+                await self.app(scope, receive, send_before_deadline)
+        except TimeoutError:
+            if response_started or not timeout.expired():
+                raise
+            logger.warning("%s %s exceeded its %.0f ms deadline", scope["method"], scope["path"], budget_ms)
+            await send_deadline_exceeded(send)
+        finally:
+            _current_deadline.reset(token)
+
+
+def query_canceled_handler(request: Request, exc: DBAPIError) -> Response:
+    # statement_timeout из дедлайна сработал на сервере раньше таймаута в приложении
+    if getattr(exc.orig, "sqlstate", None) == QUERY_CANCELED:
+        return create_exception_response(request, HTTPException(status_code=504, detail="Request deadline exceeded"))
+    return create_exception_response(request, InternalServerException())
@@ -1,9 +1,8 @@
-from dataclasses import dataclass
+import msgspec
 from uuid import UUID
 
 
-@dataclass
-class AddressCreate:
+class AddressCreate(msgspec.Struct):
     user_id: UUID
     street: str
     city: str
@@ -1,10 +1,10 @@
-from dataclasses import dataclass
 from datetime import datetime
 from uuid import UUID
 
+from dto.model_response import ModelResponse
 
-@dataclass
-class AddressResponse:
+
+class AddressResponse(ModelResponse):
     id: UUID
     user_id: UUID
     street: str
@@ -15,5 +15,3 @@ class AddressResponse:
     is_primary: bool
     created_at: datetime
     updated_at: datetime
-
-
@@ -1,9 +1,8 @@
-from dataclasses import dataclass
+import msgspec
 from typing import Optional
 
 
-@dataclass
-class AddressUpdate:
+class AddressUpdate(msgspec.Struct):
     street: Optional[str] = None
     city: Optional[str] = None
     state: Optional[str] = None
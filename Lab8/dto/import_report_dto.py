@@ -0,0 +1,13 @@
+import msgspec
+from typing import List
+
+
+class ImportRowError(msgspec.Struct):
+    line: int
+    error: str
+
+
+class ImportReport(msgspec.Struct):
+    inserted: int = 0
+    failed: int = 0
+    errors: List[ImportRowError] = []
@@ -0,0 +1,13 @@
+import msgspec
+from typing import Iterable
+
+
+class ModelResponse(msgspec.Struct):
+    # Поля читаются прямо из атрибутов ORM-модели, без промежуточного dict
+    @classmethod
+    def from_model(cls, model):
+        return msgspec.convert(model, cls, from_attributes=True)
+
+    @classmethod
+    def from_models(cls, models: Iterable) -> list:
+        return msgspec.convert(list(models), list[cls], from_attributes=True)
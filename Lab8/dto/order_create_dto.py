@@ -1,9 +1,8 @@
-from dataclasses import dataclass
+import msgspec
 from uuid import UUID
 
 
-@dataclass
-class OrderCreate:
+class OrderCreate(msgspec.Struct):
     user_id: UUID
     address_id: UUID
     product_id: UUID
@@ -1,10 +1,10 @@
-from dataclasses import dataclass
 from datetime import datetime
 from uuid import UUID
 
+from dto.model_response import ModelResponse
 
-@dataclass
-class OrderResponse:
+
+class OrderResponse(ModelResponse):
     id: UUID
     user_id: UUID
     address_id: UUID
@@ -14,5 +14,3 @@ class OrderResponse:
     status: str
     created_at: datetime
     updated_at: datetime
-
-
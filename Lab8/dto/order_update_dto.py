@@ -1,9 +1,8 @@
-from dataclasses import dataclass
+import msgspec
 from typing import Optional
 
 
-@dataclass
-class OrderUpdate:
+class OrderUpdate(msgspec.Struct):
     quantity: Optional[int] = None
     total_price: Optional[float] = None
     status: Optional[str] = None
@@ -1,9 +1,8 @@
-from dataclasses import dataclass
+import msgspec
 from typing import Optional
 
 
-@dataclass
-class ProductCreate:
+class ProductCreate(msgspec.Struct):
     name: str
     description: Optional[str] = None
     price: float = 0.0
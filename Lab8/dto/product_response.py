@@ -1,15 +1,13 @@
-from dataclasses import dataclass
 from datetime import datetime
 from uuid import UUID
 
+from dto.model_response import ModelResponse
 
-@dataclass
-class ProductResponse:
+
+class ProductResponse(ModelResponse):
     id: UUID
     name: str
     description: str | None
     price: float
     created_at: datetime
     updated_at: datetime
-
-
@@ -1,9 +1,8 @@
-from dataclasses import dataclass
+import msgspec
 from typing import Optional
 
 
-@dataclass
-class ProductUpdate:
+class ProductUpdate(msgspec.Struct):
     name: Optional[str] = None
     description: Optional[str] = None
     price: Optional[float] = None
@@ -0,0 +1,13 @@
+import msgspec
+from typing import List
+
+from dto.user_response import UserResponse
+
+
+class UserIdsRequest(msgspec.Struct):
+    ids: List[str]
+
+
+class UserBatchResponse(msgspec.Struct):
+    users: List[UserResponse] = []
+    not_found: List[str] = []
@@ -1,8 +1,7 @@
-from dataclasses import dataclass
+import msgspec
 from typing import Optional
 
-@dataclass
-class UserCreate():
+class UserCreate(msgspec.Struct):
     username: str
     email: str
     description: Optional[str] = None
\ No newline at end of file
@@ -1,13 +1,14 @@
-from dataclasses import dataclass
 from datetime import datetime
+from typing import Optional
 from uuid import UUID
 
+from dto.model_response import ModelResponse
 
-@dataclass
-class UserResponse:
+
+class UserResponse(ModelResponse):
     id: UUID
     username: str
     email: str
-    description: str
+    description: Optional[str]
     created_at: datetime
-    updated_at: datetime
\ No newline at end of file
+    updated_at: datetime
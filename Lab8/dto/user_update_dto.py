@@ -1,9 +1,8 @@
-from dataclasses import dataclass
+import msgspec
 from typing import Optional
 
 
-@dataclass
-class UserUpdate:
+class UserUpdate(msgspec.Struct):
     username: Optional[str] = None
     email: Optional[str] = None
     description: Optional[str] = None
\ No newline at end of file
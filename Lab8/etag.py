@@ -0,0 +1,96 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+from uuid import UUID
+
+from litestar import Response
+
+from metrics import record_cache_lookup
+from server_timing import timed_cache
+from settings import settings
+
+ETAG_STAMP_TTL = settings.etag_stamp_ttl
+ETAG_STAMP_MAX_SIZE = settings.etag_stamp_max_size
+
+
+def make_etag(entities: Iterable) -> str:
+    digest = hashlib.blake2b(digest_size=12)
+    for entity in entities:
+        digest.update(str(entity.id).encode())
+        digest.update(b"@")
+        if entity.updated_at is not None:
+            digest.update(entity.updated_at.isoformat().encode())
+        digest.update(b";")
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_variant(etag: str, variant: Optional[Iterable[str]]) -> str:
+    # Разные представления одного ресурса (например, ?fields=) получают разные ETag
+    if not variant:
+        return etag
+    digest = hashlib.blake2b(f"{etag}|{','.join(variant)}".encode(), digest_size=12)
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match использует слабое сравнение: префикс W/ не учитывается
+    opaque_tag = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque_tag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified(etag: str) -> Response:
+    return Response(content=None, status_code=304, headers={"ETag": etag})
+
+
+# Штампы локальны для воркера: запись через этот воркер сбрасывает штамп сразу,
+# изменения из других процессов становятся видны не позже чем через ttl
+class VersionStampCache:
+    def __init__(self, name: str, ttl: float = ETAG_STAMP_TTL, max_size: int = ETAG_STAMP_MAX_SIZE):
+        self.name = name
+        self.ttl = ttl
+        self.max_size = max_size
+        self._stamps: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+    @staticmethod
+    def _key(key) -> str:
+        try:
+            return str(UUID(str(key)))
+        except ValueError:
+            return str(key)
+
+    def get(self, key) -> Optional[str]:
+        key = self._key(key)
+        with timed_cache():
+            entry = self._stamps.get(key)
+        if entry is not None and entry[1] < time.monotonic():
+            self._stamps.pop(key, None)
+            entry = None
+        record_cache_lookup(self.name, entry is not None)
+        if entry is None:
+            return None
+        self._stamps.move_to_end(key)
+        return entry[0]
+
+    def set(self, key, etag: str) -> None:
+        key = self._key(key)
+        self._stamps[key] = (etag, time.monotonic() + self.ttl)
+        self._stamps.move_to_end(key)
+        while len(self._stamps) > self.max_size:
+            self._stamps.popitem(last=False)
+
+    def invalidate(self, key) -> None:
+        self._stamps.pop(self._key(key), None)
+
+    def clear(self) -> None:
+        self._stamps.clear()
+
+
+user_version_stamps = VersionStampCache("user_version_stamps")
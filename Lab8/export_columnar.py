@@ -0,0 +1,35 @@
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+
+from db import async_session_factory, dispose_engines
+from service.columnar_export_service import (
+    COLUMNAR_FORMATS,
+    COLUMNAR_ROW_GROUP_SIZE,
+    ColumnarExportService,
+)
+
+
+async def main(args) -> int:
+    export_service = ColumnarExportService(
+        async_session_factory, args.output_dir, args.format, args.row_group_size
+    )
+    try:
+        exported = await export_service.export(args.created_from, args.created_to)
+    finally:
+        await dispose_engines()
+
+    for table, count in exported.items():
+        print(f"{table}: {count} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Выгрузка заказов, отчётов и справочников в Parquet/Arrow")
+    parser.add_argument("output_dir")
+    parser.add_argument("--format", choices=COLUMNAR_FORMATS, default="parquet")
+    parser.add_argument("--from", dest="created_from", type=datetime.fromisoformat)
+    parser.add_argument("--to", dest="created_to", type=datetime.fromisoformat)
+    parser.add_argument("--row-group-size", type=int, default=COLUMNAR_ROW_GROUP_SIZE)
+    sys.exit(asyncio.run(main(parser.parse_args())))
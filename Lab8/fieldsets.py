@@ -0,0 +1,50 @@
+from functools import lru_cache
+from typing import Optional
+
+import msgspec
+from litestar.exceptions import ValidationException
+
+from dto.address_response import AddressResponse
+from dto.order_response import OrderResponse
+from dto.product_response import ProductResponse
+from dto.user_response import UserResponse
+
+# Разрешённые поля для ?fields= совпадают с полями ответа сущности
+USER_FIELDS = UserResponse.__struct_fields__
+PRODUCT_FIELDS = ProductResponse.__struct_fields__
+ADDRESS_FIELDS = AddressResponse.__struct_fields__
+ORDER_FIELDS = OrderResponse.__struct_fields__
+
+
+def parse_fields(raw: Optional[str], allowed: tuple[str, ...]) -> Optional[tuple[str, ...]]:
+    if raw is None:
+        return None
+
+    requested = {field.strip() for field in raw.split(",") if field.strip()}
+    if not requested:
+        raise ValidationException(detail="fields must not be empty")
+
+    unknown = sorted(requested.difference(allowed))
+    if unknown:
+        raise ValidationException(
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}"
+        )
+
+    return tuple(field for field in allowed if field in requested)
+
+
+@lru_cache(maxsize=256)
+def sparse_struct(response_type: type[msgspec.Struct], fields: tuple[str, ...]) -> type[msgspec.Struct]:
+    types = {field.name: field.type for field in msgspec.structs.fields(response_type)}
+    return msgspec.defstruct(
+        f"{response_type.__name__}Fields",
+        [(field, types[field]) for field in fields],
+    )
+
+
+def to_sparse(obj, response_type: type[msgspec.Struct], fields: tuple[str, ...]) -> msgspec.Struct:
+    return msgspec.convert(obj, sparse_struct(response_type, fields), from_attributes=True)
+
+
+def to_sparse_list(objs, response_type: type[msgspec.Struct], fields: tuple[str, ...]) -> list:
+    return msgspec.convert(list(objs), list[sparse_struct(response_type, fields)], from_attributes=True)
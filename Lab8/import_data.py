@@ -0,0 +1,47 @@
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+import msgspec
+
+from db import async_session_factory, dispose_engines
+from service.import_service import IMPORT_BATCH_SIZE, ImportService
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+async def read_file(path: str):
+    with open(path, "rb") as file:
+        while chunk := file.read(READ_CHUNK_SIZE):
+            yield chunk
+
+
+def print_progress(report) -> None:
+    print(f"\rinserted: {report.inserted}, failed: {report.failed}", end="", file=sys.stderr, flush=True)
+
+
+async def main(args) -> int:
+    import_service = ImportService(async_session_factory, batch_size=args.batch_size)
+    importer = import_service.import_products if args.entity == "products" else import_service.import_users
+    format = args.format or Path(args.path).suffix.lstrip(".").lower()
+
+    try:
+        report = await importer(read_file(args.path), format, on_progress=print_progress)
+    finally:
+        await dispose_engines()
+
+    print(file=sys.stderr)
+    print(msgspec.json.format(msgspec.json.encode(report)).decode())
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description="Массовая загрузка товаров и пользователей из CSV/NDJSON")
+    parser.add_argument("entity", choices=("products", "users"))
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=("csv", "ndjson"))
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from contextlib import AsyncExitStack, asynccontextmanager
+from time import perf_counter
+from uuid import uuid4
+
+from litestar import Litestar
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from db import async_session_factory, dispose_engines, engine, writer_engine
+from outbox_relay import OutboxRelay
+from repositories.user_repository import UserRepository
+from settings import settings
+from tracing import exporter
+
+BROKER_ENABLED = settings.broker_enabled
+OUTBOX_RELAY_ENABLED = settings.outbox_relay_enabled
+REDIS_URL = settings.redis_url
+REDIS_MAX_CONNECTIONS = settings.redis_max_connections
+WARMUP_DB_CONNECTIONS = settings.warmup_db_connections
+WARMUP_REDIS_CONNECTIONS = settings.warmup_redis_connections
+
+logger = logging.getLogger("lifespan")
+
+
+@asynccontextmanager
+async def _timed(step: str):
+    started = perf_counter()
+    yield
+    logger.info("%s ready in %.1f ms", step, (perf_counter() - started) * 1000)
+
+
+async def _cancel(task: asyncio.Task) -> None:
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+async def _run_hot_statements(session: AsyncSession) -> None:
+    # Запросы с несуществующими id ничего не возвращают, но заполняют кэш
+    # скомпилированных запросов SQLAlchemy, а на Postgres ещё и кэш prepared
+    # statements конкретного соединения
+    user_repository = UserRepository(session)
+    await user_repository.get_by_id(uuid4())
+    await user_repository.get_by_filter(10, 1)
+    await user_repository.get_by_ids([uuid4()])
+
+
+async def warm_up_database(db_engine: AsyncEngine, connections: int = WARMUP_DB_CONNECTIONS) -> None:
+    pool = db_engine.sync_engine.pool
+    if connections <= 0:
+        connections = pool.size() if hasattr(pool, "size") else 1
+
+    # Соединения держатся открытыми одновременно, иначе пул отдавал бы одно и то же
+    async with AsyncExitStack() as stack:
+        opened = await asyncio.gather(
+            *(stack.enter_async_context(db_engine.connect()) for _ in range(connections))
+        )
+        for connection in opened:
+            await connection.execute(text("SELECT 1"))
+            try:
+                async with AsyncSession(bind=connection) as session:
+                    await _run_hot_statements(session)
+            except SQLAlchemyError as e:
+                # Например, схема ещё не создана: соединения всё равно прогреты
+                logger.warning("Skipping statement warm-up: %s", e)
+            await connection.rollback()
+
+
+async def warm_up_redis(redis: Redis, connections: int = WARMUP_REDIS_CONNECTIONS) -> None:
+    await asyncio.gather(*(redis.ping() for _ in range(connections)))
+
+
+@asynccontextmanager
+async def lifespan(app: Litestar):
+    async with AsyncExitStack() as stack:
+        # Ресурсы закрываются в обратном порядке: брокер перестаёт принимать
+        # сообщения раньше, чем закрываются Redis и пул соединений с БД
+        stack.push_async_callback(dispose_engines)
+        stack.callback(exporter.flush)
+
+        async with _timed("database pool"):
+            await warm_up_database(engine)
+            if writer_engine is not None:
+                await warm_up_database(writer_engine, connections=1)
+
+        app.state.redis = None
+        if REDIS_URL:
+            redis = Redis.from_url(REDIS_URL, max_connections=REDIS_MAX_CONNECTIONS)
+            stack.push_async_callback(redis.aclose)
+            try:
+                async with _timed("redis pool"):
+                    await warm_up_redis(redis)
+                app.state.redis = redis
+            except (RedisError, OSError) as e:
+                # Redis - только кэш: без него приложение работает, просто медленнее
+                logger.warning("Redis at %s is unavailable, starting without it: %s", REDIS_URL, e)
+
+        if BROKER_ENABLED:
+            # Импорт faststream откладывается до запуска приложения
+            from broker import start_broker, stop_broker
+
+            async with _timed("broker"):
+                await start_broker()
+            stack.push_async_callback(stop_broker)
+
+            if OUTBOX_RELAY_ENABLED:
+                from broker import publisher
+
+                # Каждый воркер запускает свой релей: SKIP LOCKED делит пачки между ними
+                relay_task = asyncio.create_task(OutboxRelay(async_session_factory, publisher).run())
+                stack.push_async_callback(_cancel, relay_task)
+
+        yield
@@ -0,0 +1,212 @@
+import logging
+from contextvars import ContextVar
+from time import monotonic, perf_counter
+from typing import Optional
+
+from litestar.middleware.base import MiddlewareProtocol
+from litestar.types import ASGIApp, Message, Receive, Scope, Send
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from settings import settings
+
+pool_logger = logging.getLogger("db_pool")
+
+# Время установки новых соединений внутри текущего checkout
+_connect_durations: ContextVar[Optional[list[float]]] = ContextVar("pool_connect_durations", default=None)
+
+# При нескольких воркерах uvicorn задаётся PROMETHEUS_MULTIPROC_DIR (до импорта
+# prometheus_client): каждый процесс пишет в свой mmap-файл без общих блокировок,
+# а /metrics суммирует файлы всех воркеров при сборе
+PROMETHEUS_MULTIPROC_DIR = settings.prometheus_multiproc_dir
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being processed",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the SQLAlchemy pool",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total",
+    "Checkouts that gave up after pool_timeout with every connection busy",
+    ["pool"],
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "SQLAlchemy pool size and connection usage",
+    ["pool", "state"],
+    multiprocess_mode="livesum",
+)
+DB_SESSION_REQUESTS = Counter(
+    "db_session_requests_total",
+    "Requests that were given a DB session, by whether it ever checked out a connection",
+    ["result"],
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by result, hit ratio = hit / (hit + miss)",
+    ["cache", "result"],
+)
+COALESCED_REQUESTS = Counter(
+    "coalesced_requests_total",
+    "Reads that started a query (leader) or joined an identical one in flight (shared)",
+    ["coalescer", "result"],
+)
+BROKER_CONSUMER_LAG = Histogram(
+    "broker_consumer_lag_seconds",
+    "Delay between publishing a message and the subscriber picking it up",
+    ["queue"],
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900),
+)
+BROKER_MESSAGE_DURATION = Histogram(
+    "broker_message_duration_seconds",
+    "Subscriber handler duration",
+    ["queue", "status"],
+)
+TASK_DURATION = Histogram(
+    "taskiq_task_duration_seconds",
+    "Taskiq task execution time",
+    ["task", "status"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900),
+)
+
+
+def collect_metrics() -> bytes:
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=PROMETHEUS_MULTIPROC_DIR)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def record_db_session_use(used: bool) -> None:
+    DB_SESSION_REQUESTS.labels("used" if used else "unused").inc()
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    saturation_warning_ms = settings.db_pool_saturation_warning_ms
+    # Не чаще раза в столько секунд, чтобы под нагрузкой не залить лог
+    saturation_warning_interval = 10.0
+    _last_saturation_warning = float("-inf")
+
+    @property
+    def name(self) -> str:
+        # pool_logging_name переживает recreate() при engine.dispose()
+        return self._orig_logging_name or "main"
+
+    def _do_get(self):
+        # QueuePool повторно вызывает _do_get, если проиграл гонку за overflow:
+        # такой вызов уже входит в замер внешнего
+        if _connect_durations.get() is not None:
+            return super()._do_get()
+
+        connect_durations: list[float] = []
+        token = _connect_durations.set(connect_durations)
+        started = perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            DB_POOL_TIMEOUTS.labels(self.name).inc()
+            raise
+        finally:
+            _connect_durations.reset(token)
+            # Установка нового соединения - не ожидание в очереди, её время не считаем
+            waited = perf_counter() - started - sum(connect_durations)
+            DB_POOL_CHECKOUT_WAIT.labels(self.name).observe(waited)
+            if waited * 1000 >= self.saturation_warning_ms:
+                self._warn_saturated(waited)
+
+    def _create_connection(self):
+        started = perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            connect_durations = _connect_durations.get()
+            if connect_durations is not None:
+                connect_durations.append(perf_counter() - started)
+
+    def _warn_saturated(self, waited: float) -> None:
+        now = monotonic()
+        if now - self._last_saturation_warning < self.saturation_warning_interval:
+            return
+        self._last_saturation_warning = now
+        pool_logger.warning(
+            "DB pool %s saturated: waited %.1f ms for a connection (%s); "
+            "raise DB_POOL_SIZE/DB_MAX_OVERFLOW or look for slow queries holding connections",
+            self.name,
+            waited * 1000,
+            self.status(),
+        )
+
+
+def instrument_engine(engine) -> None:
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if not hasattr(sync_engine.pool, "checkedout"):
+        return
+
+    def update_pool_gauges(*args):
+        # Пул берём с движка при каждом вызове: dispose() подменяет его новым
+        pool = sync_engine.pool
+        name = getattr(pool, "name", "main")
+        DB_POOL_CONNECTIONS.labels(name, "size").set(pool.size())
+        DB_POOL_CONNECTIONS.labels(name, "checked_out").set(pool.checkedout())
+        DB_POOL_CONNECTIONS.labels(name, "overflow").set(max(pool.overflow(), 0))
+
+    event.listen(sync_engine.pool, "checkout", update_pool_gauges)
+    event.listen(sync_engine.pool, "checkin", update_pool_gauges)
+    update_pool_gauges()
+
+
+class MetricsMiddleware(MiddlewareProtocol):
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight = REQUESTS_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_flight.dec()
+            # Шаблон пути вместо фактического, чтобы id не раздували число серий
+            route = scope.get("path_template") or "unmatched"
+            REQUEST_LATENCY.labels(method, route, str(status_code)).observe(perf_counter() - started)
@@ -0,0 +1,22 @@
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = 'add_created_at_indexes_001'
+down_revision: Union[str, Sequence[str], None] = 'add _reports_table_001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Выгрузка идёт по диапазону created_at в порядке created_at, без индекса это полный скан с сортировкой
+    op.create_index('ix_users_created_at', 'users', ['created_at'])
+    op.create_index('ix_orders_created_at', 'orders', ['created_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_orders_created_at', table_name='orders')
+    op.drop_index('ix_users_created_at', table_name='users')
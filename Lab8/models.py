@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey
+from sqlalchemy import JSON, ForeignKey
 from sqlalchemy.orm import relationship, mapped_column, Mapped
 from sqlalchemy.ext.declarative import declarative_base
 from uuid import uuid4, UUID
@@ -16,7 +16,7 @@ class User(Base):
     username: Mapped[str] = mapped_column(nullable=False, unique=True)
     email: Mapped[str] = mapped_column(nullable=False, unique=True)
     description: Mapped[str] = mapped_column(nullable=True)
-    created_at: Mapped[datetime] = mapped_column(default=datetime.now)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.now, index=True)
     updated_at: Mapped[datetime] = mapped_column(default=datetime.now, onupdate=datetime.now)
 
     addresses = relationship("Address", back_populates="user")
@@ -70,7 +70,7 @@ class Order(Base):
     quantity: Mapped[int] = mapped_column(default=1)
     total_price: Mapped[float] = mapped_column(nullable=False)
     status: Mapped[str] = mapped_column(default="pending")
-    created_at: Mapped[datetime] = mapped_column(default=datetime.now)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.now, index=True)
     updated_at: Mapped[datetime] = mapped_column(default=datetime.now, onupdate=datetime.now)
 
     user = relationship("User", back_populates="orders")
@@ -92,4 +92,19 @@ class Report(Base):
     created_at: Mapped[datetime] = mapped_column(default=datetime.now)
     updated_at: Mapped[datetime] = mapped_column(default=datetime.now, onupdate=datetime.now)
 
-    order = relationship("Order", back_populates="reports")
\ No newline at end of file
+    order = relationship("Order", back_populates="reports")
+
+
+class OutboxEvent(Base):
+    __tablename__ = 'outbox'
+
+    id: Mapped[UUID] = mapped_column(
+        primary_key=True,
+        default=uuid4,
+    )
+    # Очередь RabbitMQ, в которую событие уйдёт через outbox_relay
+    topic: Mapped[str] = mapped_column(nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.now)
+    # NULL - событие ещё не опубликовано
+    sent_at: Mapped[datetime] = mapped_column(nullable=True, index=True)
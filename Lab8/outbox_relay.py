@@ -0,0 +1,74 @@
+import asyncio
+import logging
+from collections import defaultdict
+
+from sqlalchemy.orm import sessionmaker
+
+from repositories.outbox_repository import OutboxRepository
+from settings import settings
+
+OUTBOX_BATCH_SIZE = settings.outbox_batch_size
+OUTBOX_POLL_INTERVAL = settings.outbox_poll_interval
+
+logger = logging.getLogger("outbox_relay")
+
+
+class OutboxRelay:
+    def __init__(
+            self,
+            session_factory: sessionmaker,
+            publisher,
+            batch_size: int = OUTBOX_BATCH_SIZE,
+            poll_interval: float = OUTBOX_POLL_INTERVAL,
+    ):
+        self.session_factory = session_factory
+        self.publisher = publisher
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+
+    async def relay_once(self) -> int:
+        async with self.session_factory() as session:
+            repository = OutboxRepository(session)
+            events = await repository.claim_batch(self.batch_size)
+            if not events:
+                return 0
+
+            payloads = defaultdict(list)
+            for event in events:
+                payloads[event.topic].append(event.payload)
+            # Строки заблокированы до commit: публикуем с подтверждениями и только потом
+            # отмечаем отправленными. Сбой между ними даст повтор, но не потерю события
+            for topic, messages in payloads.items():
+                await self.publisher.publish_many(topic, messages)
+
+            await repository.mark_sent([event.id for event in events])
+            await session.commit()
+        return len(events)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                sent = await self.relay_once()
+            except Exception:
+                logger.exception("Outbox relay failed, retrying in %s s", self.poll_interval)
+                sent = 0
+            # Полная пачка - скорее всего, есть ещё: забираем следующую без паузы
+            if sent < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+
+if __name__ == "__main__":
+    from broker import broker, publisher
+    from db import async_session_factory, dispose_engines
+
+    async def main():
+        await publisher.start()
+        try:
+            await OutboxRelay(async_session_factory, publisher).run()
+        finally:
+            await publisher.close()
+            await broker.close()
+            await dispose_engines()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
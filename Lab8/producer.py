@@ -1,30 +1,18 @@
-import pika
-import json
+import asyncio
 
+from broker import broker, publisher
 
-def send_message():
-    connection = pika.BlockingConnection(
-        pika.ConnectionParameters(host='localhost', port=5672, virtual_host="local")
-    )
-    channel = connection.channel()
 
-    channel.queue_declare(queue='product')
-
-    message = {
-        'name': 'laptop',
-    }
-
-    channel.basic_publish(
-        exchange='',
-        routing_key='product',
-        body=json.dumps(message),
-        properties=pika.BasicProperties(
-            delivery_mode=2,
-        )
-    )
-    print("Сообщение отправлено:", message)
-    connection.close()
+async def send_messages(queue: str, messages: list) -> None:
+    # Подписчики здесь не нужны: только соединение брокера и пул каналов публикации
+    await publisher.start()
+    try:
+        sent = await publisher.publish_many(queue, messages)
+        print(f"Отправлено сообщений в {queue}: {sent}")
+    finally:
+        await publisher.close()
+        await broker.close()
 
 
 if __name__ == "__main__":
-    send_message()
\ No newline at end of file
+    asyncio.run(send_messages("product", [{"name": "laptop"}]))
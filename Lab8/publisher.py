@@ -0,0 +1,76 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional
+
+import msgspec
+from aio_pika import DeliveryMode, Message
+from aio_pika.abc import AbstractChannel
+from aio_pika.pool import Pool
+
+from settings import settings
+
+PUBLISHER_CHANNELS = settings.publisher_channels
+PUBLISHER_BATCH_SIZE = settings.publisher_batch_size
+
+
+class Publisher:
+    # Живёт всё время процесса: соединение и каналы открываются один раз,
+    # а не на каждое сообщение, как в старом producer.py
+    def __init__(self, broker, channels: int = PUBLISHER_CHANNELS, batch_size: int = PUBLISHER_BATCH_SIZE):
+        self.broker = broker
+        self.channels = channels
+        self.batch_size = batch_size
+        self._connection = None
+        self._pool: Optional[Pool] = None
+
+    async def start(self) -> None:
+        if self._pool is not None:
+            return
+        # connect() у RabbitBroker идемпотентен: каналы открываются на том же
+        # соединении, что и у подписчиков FastStream
+        self._connection = await self.broker.connect()
+        self._pool = Pool(self._open_channel, max_size=self.channels)
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def _open_channel(self) -> AbstractChannel:
+        return await self._connection.channel(publisher_confirms=True)
+
+    async def publish(self, queue: str, message: Any) -> None:
+        await self.publish_many(queue, [message])
+
+    async def publish_many(self, queue: str, messages: Iterable[Any]) -> int:
+        if self._pool is None:
+            raise RuntimeError("Publisher is not started")
+
+        encoded = [encode_message(message) for message in messages]
+        batches = [encoded[i:i + self.batch_size] for i in range(0, len(encoded), self.batch_size)]
+        # Пакеты расходятся по каналам пула параллельно, лишние ждут свободный канал
+        await asyncio.gather(*(self._publish_batch(queue, batch) for batch in batches))
+        return len(encoded)
+
+    async def _publish_batch(self, queue: str, batch: list[Message]) -> None:
+        async with self._pool.acquire() as channel:
+            # Публикации пакета не ждут подтверждения друг друга: RabbitMQ подтверждает
+            # их пачкой (basic.ack с multiple), и ожидания завершаются вместе
+            results = await asyncio.gather(
+                *(channel.default_exchange.publish(message, routing_key=queue, mandatory=True) for message in batch),
+                return_exceptions=True,
+            )
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            # Часть пакета могла уйти: отправка "как минимум один раз", повтор на вызывающем
+            raise errors[0]
+
+
+def encode_message(message: Any) -> Message:
+    return Message(
+        msgspec.json.encode(message),
+        content_type="application/json",
+        delivery_mode=DeliveryMode.PERSISTENT,
+        # По timestamp BrokerMetricsMiddleware считает задержку потребителя
+        timestamp=datetime.now(timezone.utc),
+    )
@@ -0,0 +1,105 @@
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from litestar.middleware.base import MiddlewareProtocol
+from litestar.types import ASGIApp, Receive, Scope, Send
+from sqlalchemy import event
+
+from settings import settings
+
+N_PLUS_ONE_DETECTION = settings.n_plus_one_detection
+N_PLUS_ONE_THRESHOLD = settings.n_plus_one_threshold
+
+logger = logging.getLogger("query_tracker")
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER = re.compile(r"(?:\$\d+(?:::\w+)?|%\(\w+\)s|%s|:\w+|\?|\b\d+(?:\.\d+)?\b)")
+_IN_LIST = re.compile(r"IN \(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+
+
+def fingerprint(statement: str) -> str:
+    # Форма запроса без значений: раскрытые IN (...) разной длины считаются одной формой
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _STRING_LITERAL.sub("?", shape)
+    shape = _PLACEHOLDER.sub("?", shape)
+    return _IN_LIST.sub("IN (?)", shape)
+
+
+class NPlusOneDetected(AssertionError):
+    pass
+
+
+class QueryTracker:
+    def __init__(self, name: str, threshold: int = N_PLUS_ONE_THRESHOLD):
+        self.name = name
+        self.threshold = threshold
+        self.count = 0
+        self.shapes: Counter[str] = Counter()
+
+    def record(self, statement: str) -> None:
+        self.count += 1
+        self.shapes[fingerprint(statement)] += 1
+
+    @property
+    def repeated(self) -> dict[str, int]:
+        return {shape: count for shape, count in self.shapes.items() if count >= self.threshold}
+
+    def report(self) -> str:
+        lines = [f"{self.name}: {self.count} statements, {len(self.shapes)} distinct shapes"]
+        for shape, count in sorted(self.repeated.items(), key=lambda item: -item[1]):
+            lines.append(f"  {count}x {shape}")
+        return "\n".join(lines)
+
+    def assert_max_queries(self, limit: int) -> None:
+        if self.count > limit:
+            raise NPlusOneDetected(f"expected at most {limit} statements\n{self.report()}")
+
+    def assert_no_repeats(self) -> None:
+        if self.repeated:
+            raise NPlusOneDetected(f"repeated statement shapes\n{self.report()}")
+
+
+_current_tracker: ContextVar[Optional[QueryTracker]] = ContextVar("query_tracker", default=None)
+
+
+def install_query_tracking(engine) -> None:
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "before_cursor_execute", _record_statement):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _record_statement)
+
+
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    tracker = _current_tracker.get()
+    if tracker is not None:
+        tracker.record(statement)
+
+
+@contextmanager
+def track_queries(name: str, threshold: int = N_PLUS_ONE_THRESHOLD) -> Iterator[QueryTracker]:
+    tracker = QueryTracker(name, threshold)
+    token = _current_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _current_tracker.reset(token)
+        if tracker.repeated:
+            logger.warning("Possible N+1 query pattern\n%s", tracker.report())
+
+
+class NPlusOneMiddleware(MiddlewareProtocol):
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not N_PLUS_ONE_DETECTION:
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries(f"{scope['method']} {scope['path']}"):
+            await self.app(scope, receive, send)
@@ -1,11 +1,8 @@
 import redis
 
-redis_client = redis.Redis(
-    host='localhost',
-    port=6379,
-    db=0,
-    decode_responses=True
-)
+from settings import settings
+
+redis_client = redis.Redis.from_url(settings.redis_url, decode_responses=True)
 
 def check_redis_connection():
     try:
@@ -15,7 +12,7 @@ def check_redis_connection():
     except redis.ConnectionError:
         print("Ошибка подключения к Redis")
         return False
-client = redis.Redis(host='localhost', port=6379, db=0)
+client = redis.Redis.from_url(settings.redis_url)
 
 client.set("user:name", "Иван")
 name = client.get("user:name")
@@ -1,4 +1,4 @@
-from dataclasses import asdict
+import msgspec
 from typing import Optional
 from uuid import UUID
 
@@ -9,8 +9,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from dto.address_create_dto import AddressCreate
 from dto.address_update_dto import AddressUpdate
 from models import Address
+from tracing import trace_methods
 
 
+@trace_methods(kind="client")
 class AddressRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -47,8 +49,7 @@ class AddressRepository:
         return list(result.scalars().all())
 
     async def create(self, address_data: AddressCreate) -> Address:
-        address_dict = asdict(address_data) if hasattr(address_data, '__dataclass_fields__') else address_data.__dict__
-        address = Address(**address_dict)
+        address = Address(**msgspec.structs.asdict(address_data))
 
         self.session.add(address)
         await self.session.flush()
@@ -61,11 +62,7 @@ class AddressRepository:
         if isinstance(address_id, str):
             address_id = UUID(address_id)
             
-        update_data = {}
-        if hasattr(address_data, '__dataclass_fields__'):
-            update_data = {k: v for k, v in asdict(address_data).items() if v is not None}
-        else:
-            update_data = {k: v for k, v in address_data.__dict__.items() if v is not None}
+        update_data = {k: v for k, v in msgspec.structs.asdict(address_data).items() if v is not None}
 
         if not update_data:
             return await self.get_by_id(address_id)
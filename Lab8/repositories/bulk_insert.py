@@ -0,0 +1,28 @@
+from datetime import datetime
+from uuid import uuid4
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def bulk_insert(session: AsyncSession, model, rows: list[dict]) -> None:
+    if not rows:
+        return
+
+    # COPY и executemany идут мимо ORM, поэтому id и даты проставляем сами
+    now = datetime.now()
+    records = [{"id": uuid4(), "created_at": now, "updated_at": now, **row} for row in rows]
+    statement = insert(model.__table__)
+    # По выражению RoutingSession отправляет вставку на соединение писателя
+    connection = await session.connection(bind_arguments={"clause": statement})
+
+    if connection.dialect.name == "postgresql":
+        raw_connection = await connection.get_raw_connection()
+        columns = list(records[0])
+        await raw_connection.driver_connection.copy_records_to_table(
+            model.__tablename__,
+            columns=columns,
+            records=[tuple(record[column] for column in columns) for record in records],
+        )
+    else:
+        await connection.execute(statement, records)
@@ -1,4 +1,4 @@
-from dataclasses import asdict
+import msgspec
 from typing import Optional
 from uuid import UUID
 
@@ -9,8 +9,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from dto.order_create_dto import OrderCreate
 from dto.order_update_dto import OrderUpdate
 from models import Order
+from repositories.table_stream import stream_table
+from tracing import trace_methods
 
 
+@trace_methods(kind="client")
 class OrderRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -55,8 +58,7 @@ class OrderRepository:
         return list(result.scalars().all())
 
     async def create(self, order_data: OrderCreate) -> Order:
-        order_dict = asdict(order_data) if hasattr(order_data, '__dataclass_fields__') else order_data.__dict__
-        order = Order(**order_dict)
+        order = Order(**msgspec.structs.asdict(order_data))
 
         self.session.add(order)
         await self.session.flush()
@@ -69,11 +71,7 @@ class OrderRepository:
         if isinstance(order_id, str):
             order_id = UUID(order_id)
             
-        update_data = {}
-        if hasattr(order_data, '__dataclass_fields__'):
-            update_data = {k: v for k, v in asdict(order_data).items() if v is not None}
-        else:
-            update_data = {k: v for k, v in order_data.__dict__.items() if v is not None}
+        update_data = {k: v for k, v in msgspec.structs.asdict(order_data).items() if v is not None}
 
         if not update_data:
             return await self.get_by_id(order_id)
@@ -124,3 +122,6 @@ class OrderRepository:
         result = await self.session.execute(query)
         return list(result.scalars().all())
 
+    async def stream(self, created_from=None, created_to=None, batch_size: int = 1000):
+        async for rows in stream_table(self.session, Order, "created_at", created_from, created_to, batch_size):
+            yield rows
@@ -0,0 +1,41 @@
+from datetime import datetime
+
+import msgspec
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import OutboxEvent
+from tracing import trace_methods
+
+
+@trace_methods(kind="client")
+class OutboxRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add(self, topic: str, payload) -> OutboxEvent:
+        # Без commit: событие фиксируется в той же транзакции, что и сама запись
+        event = OutboxEvent(topic=topic, payload=msgspec.to_builtins(payload))
+        self.session.add(event)
+        await self.session.flush()
+        return event
+
+    async def claim_batch(self, limit: int) -> list[OutboxEvent]:
+        # SKIP LOCKED: несколько релеев разбирают разные пачки, не дожидаясь друг друга.
+        # SQLite FOR UPDATE не поддерживает, там писатель и так один
+        query = (
+            select(OutboxEvent)
+                .where(OutboxEvent.sent_at.is_(None))
+                .order_by(OutboxEvent.created_at, OutboxEvent.id)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+        )
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+
+    async def mark_sent(self, event_ids) -> None:
+        await self.session.execute(
+            update(OutboxEvent)
+                .where(OutboxEvent.id.in_(event_ids))
+                .values(sent_at=datetime.now())
+        )
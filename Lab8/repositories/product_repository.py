@@ -1,4 +1,4 @@
-from dataclasses import asdict
+import msgspec
 from typing import Optional
 from uuid import UUID
 
@@ -9,8 +9,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from dto.product_create_dto import ProductCreate
 from dto.product_update_dto import ProductUpdate
 from models import Product
+from repositories.bulk_insert import bulk_insert
+from tracing import trace_methods
 
 
+@trace_methods(kind="client")
 class ProductRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -47,25 +50,23 @@ class ProductRepository:
         return list(result.scalars().all())
 
     async def create(self, product_data: ProductCreate) -> Product:
-        product_dict = asdict(product_data) if hasattr(product_data, '__dataclass_fields__') else product_data.__dict__
-        product = Product(**product_dict)
+        product = Product(**msgspec.structs.asdict(product_data))
 
         self.session.add(product)
         await self.session.flush()
         await self.session.refresh(product)
         return product
 
+    async def bulk_create(self, rows: list[dict]) -> None:
+        await bulk_insert(self.session, Product, rows)
+
     async def update(
             self, product_id, product_data: ProductUpdate
     ) -> Product:
         if isinstance(product_id, str):
             product_id = UUID(product_id)
             
-        update_data = {}
-        if hasattr(product_data, '__dataclass_fields__'):
-            update_data = {k: v for k, v in asdict(product_data).items() if v is not None}
-        else:
-            update_data = {k: v for k, v in product_data.__dict__.items() if v is not None}
+        update_data = {k: v for k, v in msgspec.structs.asdict(product_data).items() if v is not None}
 
         if not update_data:
             return await self.get_by_id(product_id)
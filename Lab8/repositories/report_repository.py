@@ -0,0 +1,28 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Report
+from repositories.bulk_insert import bulk_insert
+from tracing import trace_methods
+
+
+@trace_methods(kind="client")
+class ReportRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_existing(self, keys: list[tuple[UUID, datetime]]) -> set[tuple[UUID, datetime]]:
+        if not keys:
+            return set()
+        query = (
+            select(Report.order_id, Report.report_at)
+                .where(Report.order_id.in_({order_id for order_id, _ in keys}))
+        )
+        result = await self.session.execute(query)
+        return {(order_id, report_at) for order_id, report_at in result.all()}
+
+    async def bulk_create(self, rows: list[dict]) -> None:
+        await bulk_insert(self.session, Report, rows)
@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def stream_table(
+        session: AsyncSession,
+        model,
+        date_column: Optional[str] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        batch_size: int = 1000,
+):
+    # Серверный курсор: в памяти одновременно только batch_size строк. Колонки без
+    # ORM-сущностей, чтобы строки не копились в identity map сессии
+    query = select(*model.__table__.columns)
+    if date_column is not None:
+        column = getattr(model, date_column)
+        query = query.order_by(column, model.id)
+        if created_from is not None:
+            query = query.where(column >= created_from)
+        if created_to is not None:
+            query = query.where(column < created_to)
+
+    result = await session.stream(query.execution_options(yield_per=batch_size))
+    async for rows in result.partitions():
+        yield rows
@@ -1,38 +1,50 @@
 
-from dataclasses import asdict
+import msgspec
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import select, update, delete
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, update, delete, or_
+from sqlalchemy.orm import load_only, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from dto.user_create_dto import UserCreate
 from dto.user_update_dto import UserUpdate
 from models import User
+from repositories.bulk_insert import bulk_insert
+from repositories.table_stream import stream_table
+from tracing import trace_methods
 
 
+@trace_methods(kind="client")
 class UserRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def get_by_id(self, user_id) -> Optional[User]:
+    @staticmethod
+    def _load_options(fields: Optional[tuple[str, ...]]):
+        if not fields:
+            return selectinload(User.addresses), selectinload(User.orders)
+        # id и updated_at нужны всегда: по ним строится ETag
+        columns = dict.fromkeys(("id", "updated_at", *fields))
+        return (load_only(*(getattr(User, column) for column in columns)),)
+
+    async def get_by_id(self, user_id, fields: Optional[tuple[str, ...]] = None) -> Optional[User]:
         if isinstance(user_id, str):
             user_id = UUID(user_id)
         query = (
             select(User)
-                .options(selectinload(User.addresses), selectinload(User.orders))
+                .options(*self._load_options(fields))
                 .where(User.id == user_id)
         )
         result = await self.session.execute(query)
         return result.scalar_one_or_none()
 
     async def get_by_filter(
-            self, count: int, page: int, **kwargs
+            self, count: int, page: int, fields: Optional[tuple[str, ...]] = None, **kwargs
     ) -> list[User]:
         query = (
             select(User)
-                .options(selectinload(User.addresses), selectinload(User.orders))
+                .options(*self._load_options(fields))
                 .limit(count)
                 .offset((page - 1) * count)
         )
@@ -47,26 +59,42 @@ class UserRepository:
         result = await self.session.execute(query)
         return list(result.scalars().all())
 
+    async def get_by_ids(self, user_ids, fields: Optional[tuple[str, ...]] = None) -> list[User]:
+        user_ids = [UUID(user_id) if isinstance(user_id, str) else user_id for user_id in user_ids]
+        if not user_ids:
+            return []
+        query = select(User).where(User.id.in_(user_ids))
+        if fields:
+            query = query.options(*self._load_options(fields))
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+
     async def create(self, user_data: UserCreate) -> User:
-        user_dict = asdict(user_data) if hasattr(user_data, '__dataclass_fields__') else user_data.__dict__
-        user = User(**user_dict)
+        user = User(**msgspec.structs.asdict(user_data))
 
         self.session.add(user)
         await self.session.flush()
         await self.session.refresh(user)
         return user
 
+    async def bulk_create(self, rows: list[dict]) -> None:
+        await bulk_insert(self.session, User, rows)
+
+    async def get_taken(self, usernames: list[str], emails: list[str]) -> tuple[set[str], set[str]]:
+        query = select(User.username, User.email).where(
+            or_(User.username.in_(usernames), User.email.in_(emails))
+        )
+        result = await self.session.execute(query)
+        rows = result.all()
+        return {row.username for row in rows}, {row.email for row in rows}
+
     async def update(
             self, user_id, user_data: UserUpdate
     ) -> User:
         if isinstance(user_id, str):
             user_id = UUID(user_id)
             
-        update_data = {}
-        if hasattr(user_data, '__dataclass_fields__'):
-            update_data = {k: v for k, v in asdict(user_data).items() if v is not None}
-        else:
-            update_data = {k: v for k, v in user_data.__dict__.items() if v is not None}
+        update_data = {k: v for k, v in msgspec.structs.asdict(user_data).items() if v is not None}
 
         if not update_data:
             return await self.get_by_id(user_id)
@@ -97,4 +125,8 @@ class UserRepository:
                 .where(User.email == email)
         )
         result = await self.session.execute(query)
-        return result.scalar_one_or_none()
\ No newline at end of file
+        return result.scalar_one_or_none()
+
+    async def stream(self, created_from=None, created_to=None, batch_size: int = 1000):
+        async for rows in stream_table(self.session, User, "created_at", created_from, created_to, batch_size):
+            yield rows
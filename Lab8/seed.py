@@ -0,0 +1,149 @@
+import argparse
+import asyncio
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from db import async_session_factory, dispose_engines, engine
+from models import User, Address, Product, Order, Base
+
+
+async def reset_schema() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def seed() -> None:
+    async with async_session_factory() as session:
+        user1 = User(
+            username="John Doe",
+            email="john@example.com",
+            description="Постоянный клиент"
+        )
+        user2 = User(
+            username="Jane Smith",
+            email="jane@example.com",
+            description="Новый клиент"
+        )
+        user3 = User(
+            username="Bob Johnson",
+            email="bob@example.com",
+            description="VIP клиент"
+        )
+
+        address1 = Address(
+            user=user1,
+            street="123 Main St",
+            city="New York",
+            state="NY",
+            zip_code="10001",
+            country="USA",
+            is_primary=True
+        )
+        address2 = Address(
+            user=user1,
+            street="456 Oak Ave",
+            city="Boston",
+            state="MA",
+            zip_code="02101",
+            country="USA"
+        )
+        address3 = Address(
+            user=user2,
+            street="789 Pine Rd",
+            city="Los Angeles",
+            state="CA",
+            zip_code="90001",
+            country="USA",
+            is_primary=True
+        )
+
+        products = [
+            Product(name="Ноутбук", description="Игровой ноутбук", price=999.99),
+            Product(name="Смартфон", description="Флагманский смартфон", price=699.99),
+            Product(name="Наушники", description="Беспроводные наушники", price=199.99),
+            Product(name="Планшет", description="Графический планшет", price=499.99),
+            Product(name="Часы", description="Умные часы", price=299.99)
+        ]
+
+        session.add_all([user1, user2, user3, address1, address2, address3] + products)
+        await session.commit()
+
+        orders = [
+            Order(
+                user_id=user1.id,
+                address_id=address1.id,
+                product_id=products[0].id,
+                quantity=1,
+                total_price=products[0].price,
+                status="completed"
+            ),
+            Order(
+                user_id=user1.id,
+                address_id=address2.id,
+                product_id=products[1].id,
+                quantity=2,
+                total_price=products[1].price * 2,
+                status="pending"
+            ),
+            Order(
+                user_id=user2.id,
+                address_id=address3.id,
+                product_id=products[2].id,
+                quantity=1,
+                total_price=products[2].price,
+                status="completed"
+            ),
+            Order(
+                user_id=user3.id,
+                address_id=address1.id,
+                product_id=products[3].id,
+                quantity=3,
+                total_price=products[3].price * 3,
+                status="pending"
+            ),
+            Order(
+                user_id=user3.id,
+                address_id=address3.id,
+                product_id=products[4].id,
+                quantity=1,
+                total_price=products[4].price,
+                status="cancelled"
+            )
+        ]
+
+        session.add_all(orders)
+        await session.commit()
+
+        result = await session.execute(
+            select(User).options(
+                selectinload(User.addresses),
+                selectinload(User.orders).selectinload(Order.product),
+                selectinload(User.orders).selectinload(Order.address)
+            )
+        )
+        for user in result.scalars().all():
+            for order in user.orders:
+                print(f"  - {order.product.name} x{order.quantity} - ${order.total_price} ({order.status})")
+
+        result = await session.execute(select(Product))
+        for product in result.scalars().all():
+            print(f"{product.name}: ${product.price} - {product.description}")
+
+
+async def main(args) -> None:
+    try:
+        if args.reset:
+            await reset_schema()
+        await seed()
+    finally:
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Заполнение базы демонстрационными данными")
+    parser.add_argument(
+        "--reset", action="store_true", help="удалить и заново создать все таблицы перед заполнением"
+    )
+    asyncio.run(main(parser.parse_args()))
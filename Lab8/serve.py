@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+
+import uvicorn
+
+from settings import settings
+
+WEB_HOST = settings.web_host
+WEB_PORT = settings.web_port
+WEB_WORKERS = settings.web_workers or os.cpu_count() or 1
+WEB_KEEP_ALIVE = settings.web_keep_alive
+WEB_BACKLOG = settings.web_backlog
+WEB_GRACEFUL_TIMEOUT = settings.web_graceful_timeout
+
+DB_MAX_CONNECTIONS = settings.db_max_connections
+DB_RESERVED_CONNECTIONS = settings.db_reserved_connections
+
+
+def pool_per_worker(workers: int, max_connections: int, reserved: int) -> tuple[int, int]:
+    per_worker = max((max_connections - reserved) // workers, 1)
+    # Две трети держим постоянно открытыми, остальное - overflow под пики
+    pool_size = max(per_worker * 2 // 3, 1)
+    return pool_size, per_worker - pool_size
+
+
+def configure_environment(workers: int) -> None:
+    # Воркеры uvicorn стартуют через spawn, наследуют окружение родителя и
+    # собирают Settings заново; явно заданные в окружении или .env значения не трогаем
+    pool_size, max_overflow = pool_per_worker(workers, DB_MAX_CONNECTIONS, DB_RESERVED_CONNECTIONS)
+    if "db_pool_size" not in settings.model_fields_set:
+        os.environ["DB_POOL_SIZE"] = str(pool_size)
+    if "db_max_overflow" not in settings.model_fields_set:
+        os.environ["DB_MAX_OVERFLOW"] = str(max_overflow)
+
+    if workers > 1 and not settings.prometheus_multiproc_dir:
+        metrics_dir = os.path.join(tempfile.gettempdir(), "lab8-prometheus")
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir)
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+
+
+def main() -> None:
+    configure_environment(WEB_WORKERS)
+    uvicorn.run(
+        "main:app",
+        host=WEB_HOST,
+        port=WEB_PORT,
+        workers=WEB_WORKERS,
+        loop="uvloop",
+        http="httptools",
+        timeout_keep_alive=WEB_KEEP_ALIVE,
+        timeout_graceful_shutdown=WEB_GRACEFUL_TIMEOUT,
+        backlog=WEB_BACKLOG,
+        access_log=False,
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
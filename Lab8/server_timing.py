@@ -0,0 +1,125 @@
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Optional
+
+import msgspec
+from litestar import Response
+from litestar.datastructures import MutableScopeHeaders
+from litestar.middleware.base import MiddlewareProtocol
+from litestar.types import ASGIApp, Message, Receive, Scope, Send
+from sqlalchemy import event
+
+from settings import settings
+
+SERVER_TIMING_ENABLED = settings.server_timing_enabled
+
+logger = logging.getLogger("server_timing")
+
+
+@dataclass
+class RequestTimings:
+    started_at: float
+    db: float = 0.0
+    db_statements: int = 0
+    cache: float = 0.0
+    handler_done_at: Optional[float] = None
+    serialization: float = 0.0
+    total: float = 0.0
+
+    def header(self) -> str:
+        return (
+            f'db;dur={self.db * 1000:.2f};desc="{self.db_statements} statements", '
+            f"cache;dur={self.cache * 1000:.2f}, "
+            f"serialize;dur={self.serialization * 1000:.2f}, "
+            f"total;dur={self.total * 1000:.2f}"
+        )
+
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current_timings.get()
+
+
+@contextmanager
+def timed_cache():
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        timings.cache += perf_counter() - started
+
+
+def install_db_timing(engine) -> None:
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if _current_timings.get() is not None:
+            conn.info["server_timing_started"] = perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        timings = _current_timings.get()
+        started = conn.info.pop("server_timing_started", None)
+        if timings is not None and started is not None:
+            timings.db += perf_counter() - started
+            timings.db_statements += 1
+
+
+async def mark_handler_done(response: Response) -> Response:
+    # after_request вызывается до кодирования тела, поэтому всё, что идёт
+    # после него и до http.response.start, считается сериализацией
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.handler_done_at = perf_counter()
+    return response
+
+
+class ServerTimingMiddleware(MiddlewareProtocol):
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not SERVER_TIMING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings(started_at=perf_counter())
+        status_code = 500
+
+        async def send_with_timings(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                now = perf_counter()
+                status_code = message["status"]
+                if timings.handler_done_at is not None:
+                    timings.serialization = now - timings.handler_done_at
+                timings.total = now - timings.started_at
+                MutableScopeHeaders.from_message(message).add("Server-Timing", timings.header())
+            await send(message)
+
+        token = _current_timings.set(timings)
+        try:
+            await self.app(scope, receive, send_with_timings)
+        finally:
+            _current_timings.reset(token)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(msgspec.json.encode({
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status_code,
+                    "total_ms": round(timings.total * 1000, 3),
+                    "db_ms": round(timings.db * 1000, 3),
+                    "db_statements": timings.db_statements,
+                    "cache_ms": round(timings.cache * 1000, 3),
+                    "serialize_ms": round(timings.serialization * 1000, 3),
+                }).decode())
@@ -5,8 +5,10 @@ from dto.address_update_dto import AddressUpdate
 from models import Address
 from repositories.address_repository import AddressRepository
 from repositories.user_repository import UserRepository
+from tracing import trace_methods
 
 
+@trace_methods()
 class AddressService:
     def __init__(self, address_repository: AddressRepository, user_repository: UserRepository):
         self.address_repository = address_repository
@@ -0,0 +1,136 @@
+import os
+from datetime import datetime
+from itertools import groupby
+from typing import Optional
+from uuid import UUID
+
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.parquet as pq
+from sqlalchemy.orm import sessionmaker
+
+from models import Address, Order, Product, Report, User
+from repositories.table_stream import stream_table
+
+COLUMNAR_ROW_GROUP_SIZE = 64 * 1024
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+# Факты партиционируются по дате, справочники выгружаются целиком
+FACT_TABLES = ((Order, "created_at"), (Report, "report_at"))
+DIMENSION_TABLES = (User, Product, Address)
+
+ARROW_TYPES = {
+    UUID: pa.string(),
+    str: pa.string(),
+    int: pa.int64(),
+    float: pa.float64(),
+    bool: pa.bool_(),
+    datetime: pa.timestamp("us"),
+}
+
+
+def arrow_schema(model) -> pa.Schema:
+    return pa.schema([
+        pa.field(column.name, ARROW_TYPES[column.type.python_type], nullable=column.nullable)
+        for column in model.__table__.columns
+    ])
+
+
+def rows_to_table(rows, schema: pa.Schema) -> pa.Table:
+    columns = list(zip(*rows)) if rows else [()] * len(schema)
+    arrays = []
+    for field, values in zip(schema, columns):
+        if field.type == pa.string():
+            values = [None if value is None else str(value) for value in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+class ColumnarExportService:
+    def __init__(
+            self,
+            session_factory: sessionmaker,
+            output_dir: str,
+            format: str = "parquet",
+            row_group_size: int = COLUMNAR_ROW_GROUP_SIZE,
+    ):
+        if format not in COLUMNAR_FORMATS:
+            raise ValueError(f"Unsupported columnar format: {format}")
+        self.session_factory = session_factory
+        self.output_dir = output_dir
+        self.format = format
+        self.row_group_size = row_group_size
+
+    async def export(
+            self,
+            created_from: Optional[datetime] = None,
+            created_to: Optional[datetime] = None,
+    ) -> dict[str, int]:
+        exported = {}
+        async with self.session_factory() as session:
+            for model, date_column in FACT_TABLES:
+                exported[model.__tablename__] = await self._export_partitioned(
+                    session, model, date_column, created_from, created_to
+                )
+            for model in DIMENSION_TABLES:
+                exported[model.__tablename__] = await self._export_table(session, model)
+        return exported
+
+    def _open_writer(self, path: str, schema: pa.Schema):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if self.format == "parquet":
+            return pq.ParquetWriter(path, schema, compression="zstd")
+        return pa.ipc.new_file(path, schema)
+
+    def _write(self, writer, table: pa.Table) -> None:
+        if self.format == "parquet":
+            writer.write_table(table, row_group_size=self.row_group_size)
+        else:
+            writer.write_table(table, max_chunksize=self.row_group_size)
+
+    def _file_name(self) -> str:
+        return f"part-0.{self.format}"
+
+    async def _export_table(self, session, model) -> int:
+        schema = arrow_schema(model)
+        path = os.path.join(self.output_dir, model.__tablename__, self._file_name())
+        count = 0
+        writer = self._open_writer(path, schema)
+        try:
+            async for rows in stream_table(session, model, batch_size=self.row_group_size):
+                self._write(writer, rows_to_table(rows, schema))
+                count += len(rows)
+        finally:
+            writer.close()
+        return count
+
+    async def _export_partitioned(self, session, model, date_column, created_from, created_to) -> int:
+        # Строки приходят отсортированными по дате, поэтому в каждый момент
+        # открыт только один файл: партиция закрывается, как только дата сменилась
+        schema = arrow_schema(model)
+        date_index = schema.get_field_index(date_column)
+        partition_key = f"{date_column.removesuffix('_at')}_date"
+        count = 0
+        writer, current_date = None, None
+        try:
+            async for rows in stream_table(
+                    session, model, date_column, created_from, created_to, self.row_group_size
+            ):
+                for day, day_rows in groupby(rows, key=lambda row: row[date_index].date()):
+                    if day != current_date:
+                        if writer is not None:
+                            writer.close()
+                        path = os.path.join(
+                            self.output_dir,
+                            model.__tablename__,
+                            f"{partition_key}={day.isoformat()}",
+                            self._file_name(),
+                        )
+                        writer, current_date = self._open_writer(path, schema), day
+                    day_rows = list(day_rows)
+                    self._write(writer, rows_to_table(day_rows, schema))
+                    count += len(day_rows)
+        finally:
+            if writer is not None:
+                writer.close()
+        return count
@@ -0,0 +1,53 @@
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+import msgspec
+from sqlalchemy.orm import sessionmaker
+
+from dto.order_response import OrderResponse
+from dto.user_response import UserResponse
+from repositories.order_repository import OrderRepository
+from repositories.user_repository import UserRepository
+
+EXPORT_BATCH_SIZE = 1000
+
+
+class ExportService:
+    def __init__(self, session_factory: sessionmaker, batch_size: int = EXPORT_BATCH_SIZE):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+
+    def orders_ndjson(
+            self,
+            created_from: Optional[datetime] = None,
+            created_to: Optional[datetime] = None,
+            compress: bool = False,
+    ) -> AsyncIterator[bytes]:
+        return self._ndjson(OrderRepository, OrderResponse, created_from, created_to, compress)
+
+    def users_ndjson(
+            self,
+            created_from: Optional[datetime] = None,
+            created_to: Optional[datetime] = None,
+            compress: bool = False,
+    ) -> AsyncIterator[bytes]:
+        return self._ndjson(UserRepository, UserResponse, created_from, created_to, compress)
+
+    async def _ndjson(self, repository_type, response_type, created_from, created_to, compress):
+        encoder = msgspec.json.Encoder()
+        compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+
+        # Сессия живёт столько же, сколько поток: зависимость db_session закрывается
+        # раньше, чем Litestar начинает отправлять тело ответа
+        async with self.session_factory() as session:
+            repository = repository_type(session)
+            async for rows in repository.stream(created_from, created_to, self.batch_size):
+                chunk = encoder.encode_lines(response_type.from_models(rows))
+                if compressor:
+                    chunk = compressor.compress(chunk)
+                if chunk:
+                    yield chunk
+
+        if compressor:
+            yield compressor.flush()
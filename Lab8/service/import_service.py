@@ -0,0 +1,176 @@
+import csv
+import logging
+from typing import AsyncIterable, AsyncIterator, Callable, Optional
+
+import msgspec
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from dto.import_report_dto import ImportReport, ImportRowError
+from dto.product_create_dto import ProductCreate
+from dto.user_create_dto import UserCreate
+from repositories.product_repository import ProductRepository
+from repositories.user_repository import UserRepository
+
+IMPORT_BATCH_SIZE = 1000
+IMPORT_MAX_ERRORS = 100
+IMPORT_FORMATS = ("csv", "ndjson")
+
+logger = logging.getLogger("import")
+
+
+async def _split_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[tuple[int, bytes]]:
+    buffer = b""
+    line_number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        lines = buffer.split(b"\n")
+        buffer = lines.pop()
+        for line in lines:
+            line_number += 1
+            yield line_number, line.rstrip(b"\r")
+    if buffer:
+        yield line_number + 1, buffer.rstrip(b"\r")
+
+
+async def _csv_records(chunks: AsyncIterable[bytes]) -> AsyncIterator[tuple[int, bytes]]:
+    # Поле в кавычках может содержать перевод строки: копим строки, пока кавычки не закроются
+    record: list[bytes] = []
+    start = 0
+    async for line_number, line in _split_lines(chunks):
+        if not record:
+            if not line.strip():
+                continue
+            start = line_number
+        record.append(line)
+        joined = b"\n".join(record)
+        if joined.count(b'"') % 2 == 0:
+            record = []
+            yield start, joined
+    if record:
+        yield start, b"\n".join(record)
+
+
+class ImportService:
+    def __init__(
+            self,
+            session_factory: sessionmaker,
+            batch_size: int = IMPORT_BATCH_SIZE,
+            max_errors: int = IMPORT_MAX_ERRORS,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+
+    async def import_products(
+            self,
+            chunks: AsyncIterable[bytes],
+            format: str,
+            on_progress: Optional[Callable[[ImportReport], None]] = None,
+    ) -> ImportReport:
+        return await self._import(chunks, format, ProductCreate, self._insert_products, on_progress)
+
+    async def import_users(
+            self,
+            chunks: AsyncIterable[bytes],
+            format: str,
+            on_progress: Optional[Callable[[ImportReport], None]] = None,
+    ) -> ImportReport:
+        return await self._import(chunks, format, UserCreate, self._insert_users, on_progress)
+
+    async def _import(self, chunks, format, row_type, insert, on_progress) -> ImportReport:
+        if format not in IMPORT_FORMATS:
+            raise ValueError(f"Unsupported import format: {format}")
+
+        report = ImportReport()
+        batch = []
+        # Память ограничена одной пачкой строк: файл целиком не читается
+        async with self.session_factory() as session:
+            async for line_number, row in self._rows(chunks, format, row_type, report):
+                batch.append((line_number, row))
+                if len(batch) >= self.batch_size:
+                    await self._flush(session, insert, batch, report, row_type, on_progress)
+                    batch = []
+            if batch:
+                await self._flush(session, insert, batch, report, row_type, on_progress)
+        report.errors.sort(key=lambda error: error.line)
+        return report
+
+    async def _rows(self, chunks, format, row_type, report: ImportReport):
+        if format == "ndjson":
+            decoder = msgspec.json.Decoder(row_type)
+            async for line_number, line in _split_lines(chunks):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, decoder.decode(line)
+                except msgspec.DecodeError as e:
+                    self._reject(report, line_number, str(e))
+            return
+
+        header = None
+        async for line_number, record in _csv_records(chunks):
+            try:
+                values = next(csv.reader([record.decode("utf-8-sig" if header is None else "utf-8")]))
+                if header is None:
+                    header = [column.strip() for column in values]
+                    continue
+                if len(values) != len(header):
+                    raise ValueError(f"Expected {len(header)} columns, got {len(values)}")
+                # Пустая ячейка означает отсутствие значения, а не пустую строку
+                row = {column: value for column, value in zip(header, values) if value != ""}
+                yield line_number, msgspec.convert(row, row_type, strict=False)
+            except (msgspec.ValidationError, ValueError, csv.Error) as e:
+                self._reject(report, line_number, str(e))
+
+    def _reject(self, report: ImportReport, line_number: int, error: str) -> None:
+        report.failed += 1
+        if len(report.errors) < self.max_errors:
+            report.errors.append(ImportRowError(line=line_number, error=error))
+
+    async def _flush(self, session: AsyncSession, insert, batch, report, row_type, on_progress) -> None:
+        try:
+            rejected = await insert(session, batch)
+            await session.commit()
+        except Exception as e:
+            # Пачка откатывается целиком, уже загруженные пачки остаются в базе
+            await session.rollback()
+            rejected = [(line_number, f"Batch insert failed: {e}") for line_number, _ in batch]
+
+        for line_number, error in rejected:
+            self._reject(report, line_number, error)
+        report.inserted += len(batch) - len(rejected)
+
+        logger.info(
+            "%s import: %d inserted, %d failed", row_type.__name__, report.inserted, report.failed
+        )
+        if on_progress:
+            on_progress(report)
+
+    @staticmethod
+    async def _insert_products(session: AsyncSession, batch) -> list[tuple[int, str]]:
+        await ProductRepository(session).bulk_create(
+            [msgspec.structs.asdict(product) for _, product in batch]
+        )
+        return []
+
+    @staticmethod
+    async def _insert_users(session: AsyncSession, batch) -> list[tuple[int, str]]:
+        repository = UserRepository(session)
+        usernames, emails = await repository.get_taken(
+            [user.username for _, user in batch], [user.email for _, user in batch]
+        )
+
+        accepted, rejected = [], []
+        for line_number, user in batch:
+            if user.username in usernames:
+                rejected.append((line_number, f"Username {user.username} already exists"))
+            elif user.email in emails:
+                rejected.append((line_number, f"Email {user.email} already exists"))
+            else:
+                usernames.add(user.username)
+                emails.add(user.email)
+                accepted.append(msgspec.structs.asdict(user))
+
+        await repository.bulk_create(accepted)
+        return rejected
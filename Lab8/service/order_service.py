@@ -1,25 +1,32 @@
 from sqlite3 import IntegrityError
 from typing import Optional
 
+from dto.order_response import OrderResponse
 from models import Order
+from repositories.outbox_repository import OutboxRepository
 from repositories.order_repository import OrderRepository
 from repositories.user_repository import UserRepository
 from repositories.product_repository import ProductRepository
 from repositories.address_repository import AddressRepository
+from tracing import trace_methods
 
 
+@trace_methods()
 class OrderService:
     def __init__(
         self,
         order_repository: OrderRepository,
         user_repository: UserRepository,
         product_repository: ProductRepository,
-        address_repository: AddressRepository
+        address_repository: AddressRepository,
+        outbox_repository: Optional[OutboxRepository] = None,
     ):
         self.order_repository = order_repository
         self.user_repository = user_repository
         self.product_repository = product_repository
         self.address_repository = address_repository
+        # Событие о заказе пишется в outbox той же сессией, что и сам заказ
+        self.outbox_repository = outbox_repository or OutboxRepository(order_repository.session)
 
     async def get_by_id(self, order_id) -> Optional[Order]:
         if not order_id:
@@ -80,6 +87,7 @@ class OrderService:
 
         try:
             order = await self.order_repository.create(order_data)
+            await self.outbox_repository.add("order", OrderResponse.from_model(order))
             await self.order_repository.session.commit()
             return order
         except IntegrityError as e:
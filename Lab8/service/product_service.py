@@ -1,13 +1,18 @@
 from sqlite3 import IntegrityError
 from typing import Optional
 
+from dto.product_response import ProductResponse
 from models import Product
+from repositories.outbox_repository import OutboxRepository
 from repositories.product_repository import ProductRepository
+from tracing import trace_methods
 
 
+@trace_methods()
 class ProductService:
-    def __init__(self, product_repository: ProductRepository):
+    def __init__(self, product_repository: ProductRepository, outbox_repository: Optional[OutboxRepository] = None):
         self.product_repository = product_repository
+        self.outbox_repository = outbox_repository or OutboxRepository(product_repository.session)
 
     async def get_by_id(self, product_id) -> Optional[Product]:
         if not product_id:
@@ -46,6 +51,7 @@ class ProductService:
 
         try:
             product = await self.product_repository.create(product_data)
+            await self.outbox_repository.add("product", ProductResponse.from_model(product))
             await self.product_repository.session.commit()
             return product
         except IntegrityError as e:
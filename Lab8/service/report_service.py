@@ -0,0 +1,34 @@
+from datetime import datetime
+from uuid import UUID
+
+from repositories.report_repository import ReportRepository
+from tracing import trace_methods
+
+
+@trace_methods()
+class ReportService:
+    def __init__(self, report_repository: ReportRepository):
+        self.report_repository = report_repository
+
+    async def record_orders(self, orders: list[dict]) -> int:
+        # Отчёт за день создания заказа, как в ежедневной задаче планировщика.
+        # Повторная доставка того же заказа второй отчёт не создаёт
+        rows = {}
+        for order in orders:
+            created_at = datetime.fromisoformat(order["created_at"])
+            report_at = datetime.combine(created_at.date(), datetime.min.time())
+            rows.setdefault((UUID(order["id"]), report_at), order["quantity"])
+
+        try:
+            existing = await self.report_repository.get_existing(list(rows))
+            new_rows = [
+                {"order_id": order_id, "report_at": report_at, "count_product": quantity}
+                for (order_id, report_at), quantity in rows.items()
+                if (order_id, report_at) not in existing
+            ]
+            await self.report_repository.bulk_create(new_rows)
+            await self.report_repository.session.commit()
+            return len(new_rows)
+        except Exception as e:
+            await self.report_repository.session.rollback()
+            raise ValueError(f"Failed to record order reports: {str(e)}")
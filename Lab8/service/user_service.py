@@ -1,31 +1,63 @@
 from sqlite3 import IntegrityError
 from typing import Optional
+from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from dto.user_create_dto import UserCreate
 from dto.user_update_dto import UserUpdate
+from etag import user_version_stamps
 from models import User
 from repositories.user_repository import UserRepository
+from tracing import trace_methods
 
 
+@trace_methods()
 class UserService:
     def __init__(self, user_repository: UserRepository):
         self.user_repository = user_repository
 
-    async def get_by_id(self, user_id) -> Optional[User]:
+    async def get_by_id(self, user_id, fields: Optional[tuple[str, ...]] = None) -> Optional[User]:
         if not user_id:
             raise ValueError("User ID is required")
 
-        user = await self.user_repository.get_by_id(user_id)
+        user = await self.user_repository.get_by_id(user_id, fields=fields)
 
         if not user:
             return None
 
         return user
 
+    async def get_by_ids(
+            self, user_ids, fields: Optional[tuple[str, ...]] = None
+    ) -> tuple[list[User], list[str]]:
+        # Дубликаты отсекаются по UUID, а не по строке: id в другом регистре или
+        # без дефисов - тот же пользователь. В not_found остаётся первое написание
+        requested: dict = {}
+        for user_id in user_ids:
+            user_id = str(user_id)
+            try:
+                key = UUID(user_id)
+            except ValueError:
+                key = user_id
+            requested.setdefault(key, user_id)
+
+        valid_ids = [key for key in requested if isinstance(key, UUID)]
+        users = await self.user_repository.get_by_ids(valid_ids, fields=fields)
+        users_by_id = {user.id: user for user in users}
+
+        found = []
+        not_found = []
+        for key, user_id in requested.items():
+            user = users_by_id.get(key)
+            if user:
+                found.append(user)
+            else:
+                not_found.append(user_id)
+        return found, not_found
+
     async def get_by_filter(
-            self, count: int, page: int, **kwargs
+            self, count: int, page: int, fields: Optional[tuple[str, ...]] = None, **kwargs
     ) -> list[User]:
         if count <= 0:
             raise ValueError("Count must be positive")
@@ -38,7 +70,7 @@ class UserService:
                 valid_filters[key] = value
 
         users = await self.user_repository.get_by_filter(
-            count, page, **valid_filters
+            count, page, fields=fields, **valid_filters
         )
         return users
 
@@ -101,6 +133,7 @@ class UserService:
         try:
             user = await self.user_repository.update(user_id, user_data)
             await self.user_repository.session.commit()
+            user_version_stamps.invalidate(user_id)
             return user
         except IntegrityError as e:
             await self.user_repository.session.rollback()
@@ -123,6 +156,7 @@ class UserService:
         try:
             await self.user_repository.delete(user_id)
             await self.user_repository.session.commit()
+            user_version_stamps.invalidate(user_id)
         except Exception as e:
             await self.user_repository.session.rollback()
             raise ValueError(f"Failed to delete user: {str(e)}")
\ No newline at end of file
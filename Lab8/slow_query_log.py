@@ -0,0 +1,137 @@
+import logging
+import os
+import random
+import sys
+from logging.handlers import RotatingFileHandler
+from time import perf_counter
+from typing import Optional
+
+import greenlet
+from sqlalchemy import event
+
+from settings import settings
+
+SLOW_QUERY_THRESHOLD_MS = settings.slow_query_threshold_ms
+SLOW_QUERY_LOG_FILE = settings.slow_query_log_file
+SLOW_QUERY_LOG_MAX_BYTES = settings.slow_query_log_max_bytes
+SLOW_QUERY_LOG_BACKUPS = settings.slow_query_log_backups
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = settings.slow_query_explain_sample_rate
+
+REPOSITORIES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "repositories")
+
+logger = logging.getLogger("slow_query")
+
+
+def configure_slow_query_logger(path: str = SLOW_QUERY_LOG_FILE) -> None:
+    if any(isinstance(handler, RotatingFileHandler) for handler in logger.handlers):
+        return
+    handler = RotatingFileHandler(
+        path, maxBytes=SLOW_QUERY_LOG_MAX_BYTES, backupCount=SLOW_QUERY_LOG_BACKUPS, delay=True
+    )
+    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.WARNING)
+
+
+def redact_parameters(parameters, executemany: bool):
+    # В лог попадают только типы значений: email, описания и т.п. не утекают
+    if executemany:
+        return f"<{len(parameters)} rows>"
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def _repository_method(code) -> Optional[str]:
+    if code.co_filename.startswith(REPOSITORIES_DIR):
+        return code.co_qualname
+    return None
+
+
+def find_repository_caller() -> Optional[str]:
+    # AsyncEngine выполняет запрос в дочернем greenlet, а корутина репозитория
+    # лежит в стеке родительского, поэтому проходим по стекам всех greenlet-ов
+    frame = sys._getframe(1)
+    current = greenlet.getcurrent()
+    while True:
+        while frame is not None:
+            caller = _repository_method(frame.f_code)
+            if caller:
+                return caller
+            frame = frame.f_back
+        current = current.parent
+        if current is None:
+            return None
+        frame = current.gr_frame
+
+
+def _explain(conn, statement: str, parameters) -> Optional[str]:
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) "
+    elif dialect == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    else:
+        return None
+
+    # EXPLAIN ANALYZE выполняет запрос повторно, поэтому только для SELECT
+    # и на отдельном курсоре, чтобы не потерять результат исходного запроса
+    cursor = conn.connection.dbapi_connection.cursor()
+    # Курсор работает в транзакции вызывающего кода: ошибка EXPLAIN перевела бы её
+    # в aborted, а побочные эффекты ANALYZE остались бы в ней. Точка сохранения
+    # откатывает и то и другое, не трогая саму транзакцию
+    savepoint = dialect == "postgresql"
+    try:
+        if savepoint:
+            cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            return "\n".join(" ".join(str(column) for column in row) for row in cursor.fetchall())
+        finally:
+            if savepoint:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+    finally:
+        cursor.close()
+
+
+def install_slow_query_log(
+        engine,
+        threshold_ms: float = SLOW_QUERY_THRESHOLD_MS,
+        explain_sample_rate: float = SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+) -> None:
+    sync_engine = getattr(engine, "sync_engine", engine)
+    configure_slow_query_logger()
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context.slow_query_started = perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "slow_query_started", None)
+        if started is None:
+            return
+        duration_ms = (perf_counter() - started) * 1000
+        if duration_ms < threshold_ms:
+            return
+
+        plan = None
+        is_select = statement.lstrip()[:6].upper() == "SELECT"
+        if is_select and not executemany and random.random() < explain_sample_rate:
+            try:
+                plan = _explain(conn, statement, parameters)
+            except Exception as e:
+                plan = f"EXPLAIN failed: {e}"
+
+        logger.warning(
+            "slow query %.1f ms caller=%s params=%s\n%s%s",
+            duration_ms,
+            find_repository_caller() or "unknown",
+            redact_parameters(parameters, executemany),
+            " ".join(statement.split()),
+            f"\n{plan}" if plan else "",
+        )
@@ -1,8 +1,7 @@
 import pytest
 from litestar.testing import TestClient
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
 
+from db import build_engine, build_session_factory
 from main import app
 from models import Base
 from repositories.order_repository import OrderRepository
@@ -14,7 +13,7 @@ TEST_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
 
 @pytest.fixture(scope="session")
 def engine():
-    return create_async_engine(TEST_DATABASE_URL, echo=True)
+    return build_engine(TEST_DATABASE_URL, echo=True)
 
 
 @pytest.fixture(scope="session")
@@ -31,9 +30,7 @@ async def tables(engine):
 
 @pytest.fixture
 async def session(engine, tables):
-    async_session = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
+    async_session = build_session_factory(engine)
     async with async_session() as session:
         yield session
 
@@ -0,0 +1,4 @@
+import os
+
+# Профиль выбирается при импорте settings, то есть до импорта тестовых модулей
+os.environ.setdefault("APP_ENV", "test")
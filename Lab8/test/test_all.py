@@ -1,4 +1,17 @@
+import asyncio
+import gzip
+import json
+import logging
+import re
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import msgspec
 import pytest
+from litestar import Litestar
+from litestar.di import Provide
+from litestar.testing import AsyncTestClient, RequestFactory
 try:
     import pytest_asyncio
     pytest_asyncio_available = True
@@ -8,8 +21,11 @@ except ImportError:
     # но это может не работать правильно с async фикстурами
     pytest_asyncio = pytest
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from prometheus_client import REGISTRY
+from prometheus_client.mmap_dict import MmapedDict, mmap_key
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import uuid4
 
 from dto.user_create_dto import UserCreate
@@ -20,7 +36,21 @@ from dto.address_create_dto import AddressCreate
 from dto.address_update_dto import AddressUpdate
 from dto.order_create_dto import OrderCreate
 from dto.order_update_dto import OrderUpdate
-from models import Base
+from dto.order_response import OrderResponse
+from dto.user_response import UserResponse
+from coalescing import RequestCoalescer, coalescing_key
+from etag import etag_matches, make_etag, user_version_stamps
+from fieldsets import USER_FIELDS, parse_fields
+import lifespan as lifespan_module
+from lifespan import warm_up_database
+from serve import pool_per_worker
+import dependencies
+from deadline import DeadlineMiddleware, query_canceled_handler, remaining_ms, request_budget_ms
+from controller import user_controller
+from settings import load_settings
+from db import build_engine, build_engine_options, build_session_factory, build_writer_engine
+from models import Base, OutboxEvent, Report
+from query_tracker import NPlusOneDetected, install_query_tracking, track_queries
 from repositories.user_repository import UserRepository
 from repositories.product_repository import ProductRepository
 from repositories.address_repository import AddressRepository
@@ -29,13 +59,29 @@ from service.user_service import UserService
 from service.product_service import ProductService
 from service.address_service import AddressService
 from service.order_service import OrderService
+from service.export_service import ExportService
+from service.import_service import ImportService
+from service.columnar_export_service import ColumnarExportService
+import server_timing
+import slow_query_log
+import tracing
+from publisher import Publisher
+from outbox_relay import OutboxRelay
+from batching import MessageBatcher
+from repositories.report_repository import ReportRepository
+from service.report_service import ReportService
+from controller.user_controller import UserController
+import metrics
+from controller.metrics_controller import MetricsController
+from metrics import MetricsMiddleware
+from server_timing import ServerTimingMiddleware, mark_handler_done
 
 TEST_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
 
 
 @pytest.fixture(scope="session")
 def engine():
-    return create_async_engine(TEST_DATABASE_URL, echo=False)
+    return build_engine(TEST_DATABASE_URL, echo=False)
 
 
 @pytest_asyncio.fixture(scope="session")
@@ -62,14 +108,25 @@ async def session(engine, tables):
         # Таблицы уже могут быть созданы, это нормально
         pass
     
-    async_session = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
+    async_session = build_session_factory(engine)
     async with async_session() as s:
         yield s
         await s.rollback()
 
 
+@pytest.fixture
+def max_queries(engine):
+    install_query_tracking(engine)
+
+    @contextmanager
+    def _max_queries(limit: int, name: str = "test"):
+        with track_queries(name) as tracker:
+            yield tracker
+        tracker.assert_max_queries(limit)
+
+    return _max_queries
+
+
 @pytest_asyncio.fixture
 async def user_repository(session):
     return UserRepository(session)
@@ -111,6 +168,28 @@ async def order_service(order_repository, user_repository, product_repository, a
 
 
 
+@pytest_asyncio.fixture
+async def http_client(engine, tables, monkeypatch):
+    # Тот же стек middleware, что в main.py, но на тестовой базе и без lifespan
+    session_factory = build_session_factory(engine)
+    monkeypatch.setattr(dependencies, "async_session_factory", session_factory)
+    monkeypatch.setattr(user_controller, "async_session_factory", session_factory)
+    app = Litestar(
+        route_handlers=[UserController],
+        dependencies={
+            "db_session": Provide(dependencies.provide_db_session),
+            "user_repository": Provide(dependencies.provide_user_repository),
+            "user_service": Provide(dependencies.provide_user_service),
+        },
+        middleware=[MetricsMiddleware, ServerTimingMiddleware, DeadlineMiddleware],
+        exception_handlers={DBAPIError: query_canceled_handler},
+        after_request=mark_handler_done,
+        logging_config=None,
+    )
+    async with AsyncTestClient(app) as client:
+        yield client
+
+
 class TestUserRepository:
     @pytest.mark.asyncio
     async def test_create_user(self, user_repository: UserRepository, session: AsyncSession):
@@ -207,6 +286,29 @@ class TestUserRepository:
         assert len(users) == 1
         assert users[0].username == "filter1"
 
+    @pytest.mark.asyncio
+    async def test_get_by_ids(self, user_repository: UserRepository, session: AsyncSession):
+        user1 = await user_repository.create(UserCreate(username="ids1", email="ids1@example.com"))
+        user2 = await user_repository.create(UserCreate(username="ids2", email="ids2@example.com"))
+        await session.commit()
+
+        users = await user_repository.get_by_ids([str(user1.id), user2.id, uuid4()])
+        assert {user.id for user in users} == {user1.id, user2.id}
+
+    @pytest.mark.asyncio
+    async def test_get_by_id_with_fields(self, user_repository: UserRepository, session: AsyncSession):
+        user = await user_repository.create(UserCreate(username="sparse", email="sparse@example.com"))
+        await session.commit()
+        session.expunge_all()
+
+        fields = parse_fields("username", USER_FIELDS)
+        found_user = await user_repository.get_by_id(user.id, fields=fields)
+
+        unloaded = inspect(found_user).unloaded
+        assert found_user.username == "sparse"
+        assert {"email", "description", "addresses", "orders"} <= unloaded
+        assert "updated_at" not in unloaded
+
 
 class TestUserService:
     @pytest.mark.asyncio
@@ -248,6 +350,33 @@ class TestUserService:
         assert found_user is not None
         assert found_user.id == user.id
 
+    @pytest.mark.asyncio
+    async def test_get_by_ids_keeps_order_and_reports_missing(self, user_service: UserService, session: AsyncSession):
+        user1 = await user_service.create(UserCreate(username="batch1", email="batch1@example.com"))
+        user2 = await user_service.create(UserCreate(username="batch2", email="batch2@example.com"))
+        missing_id = str(uuid4())
+
+        users, not_found = await user_service.get_by_ids(
+            [str(user2.id), "not-a-uuid", str(user1.id), missing_id, str(user2.id)]
+        )
+
+        assert [user.id for user in users] == [user2.id, user1.id]
+        assert not_found == ["not-a-uuid", missing_id]
+
+    @pytest.mark.asyncio
+    async def test_get_by_ids_dedups_on_uuid(self, user_service: UserService, session: AsyncSession):
+        user = await user_service.create(UserCreate(username="batch_case", email="batch_case@example.com"))
+        missing_id = uuid4()
+
+        users, not_found = await user_service.get_by_ids(
+            [str(user.id).upper(), user.id.hex, str(missing_id).upper(), str(missing_id)],
+            fields=("id", "username"),
+        )
+
+        assert [found.id for found in users] == [user.id]
+        assert users[0].username == "batch_case"
+        assert not_found == [str(missing_id).upper()]
+
     @pytest.mark.asyncio
     async def test_update_user(self, user_service: UserService, session: AsyncSession):
         user_data = UserCreate(username="update_service", email="update_service@example.com")
@@ -258,6 +387,19 @@ class TestUserService:
 
         assert updated_user.description == "Updated description"
 
+    @pytest.mark.asyncio
+    async def test_update_user_invalidates_version_stamp(self, user_service: UserService, session: AsyncSession):
+        user = await user_service.create(UserCreate(username="etag_service", email="etag_service@example.com"))
+        etag = make_etag([user])
+        user_version_stamps.set(user.id, etag)
+
+        assert user_version_stamps.get(str(user.id).upper()) == etag
+        assert etag_matches(f'"other", {etag.removeprefix("W/")}', etag)
+
+        await user_service.update(user.id, UserUpdate(description="Changed"))
+
+        assert user_version_stamps.get(user.id) is None
+
     @pytest.mark.asyncio
     async def test_delete_user(self, user_service: UserService, session: AsyncSession):
         user_data = UserCreate(username="delete_service", email="delete_service@example.com")
@@ -744,6 +886,790 @@ class TestOrderService:
         assert found_order is None
 
 
+class TestQueryCounts:
+    @pytest.mark.asyncio
+    async def test_detects_repeated_lookups(self, user_service: UserService, max_queries, session: AsyncSession):
+        with max_queries(10) as tracker:
+            for _ in range(3):
+                await user_service.get_by_id(uuid4())
+
+        assert tracker.repeated
+        with pytest.raises(NPlusOneDetected):
+            tracker.assert_no_repeats()
+
+    @pytest.mark.asyncio
+    async def test_user_service_query_budget(self, user_service: UserService, max_queries, session: AsyncSession):
+        with max_queries(4, "UserService.create"):
+            user = await user_service.create(UserCreate(username="budget_user", email="budget@example.com"))
+        with max_queries(3, "UserService.get_by_id"):
+            await user_service.get_by_id(user.id)
+        with max_queries(3, "UserService.get_by_filter"):
+            await user_service.get_by_filter(10, 1)
+        with max_queries(1, "UserService.get_by_ids"):
+            await user_service.get_by_ids([user.id, uuid4()])
+        with max_queries(7, "UserService.update"):
+            await user_service.update(user.id, UserUpdate(description="budget"))
+
+    @pytest.mark.asyncio
+    async def test_order_service_query_budget(
+        self,
+        order_service: OrderService,
+        user_service: UserService,
+        address_service: AddressService,
+        product_service: ProductService,
+        max_queries,
+        session: AsyncSession
+    ):
+        user = await user_service.create(UserCreate(username="budget_order", email="budget_order@example.com"))
+        address = await address_service.create(AddressCreate(
+            user_id=user.id, street="Budget St", city="City", state="ST", zip_code="00000", country="USA"
+        ))
+        product = await product_service.create(ProductCreate(name="Budget Product", price=10.0))
+
+        # Включая INSERT события в outbox в той же транзакции
+        with max_queries(11, "OrderService.create"):
+            order = await order_service.create(OrderCreate(
+                user_id=user.id, address_id=address.id, product_id=product.id, quantity=2
+            ))
+        with max_queries(4, "OrderService.get_by_id"):
+            await order_service.get_by_id(order.id)
+        with max_queries(2, "ProductService.get_by_id"):
+            await product_service.get_by_id(product.id)
+
+
+class TestResponseStructs:
+    @pytest.mark.asyncio
+    async def test_convert_and_encode_orm_rows(
+        self,
+        user_service: UserService,
+        address_service: AddressService,
+        product_service: ProductService,
+        order_service: OrderService,
+    ):
+        user = await user_service.create(UserCreate(username="struct_user", email="struct_user@example.com"))
+        address = await address_service.create(AddressCreate(
+            user_id=user.id, street="Struct St", city="City", state="ST", zip_code="1", country="RU"
+        ))
+        product = await product_service.create(ProductCreate(name="Struct Product", price=5.0))
+        order = await order_service.create(OrderCreate(
+            user_id=user.id, address_id=address.id, product_id=product.id, quantity=2, total_price=10.0
+        ))
+
+        users = UserResponse.from_models([user])
+        assert isinstance(users[0], UserResponse)
+        assert users[0].id == user.id and users[0].description is None
+
+        payload = msgspec.json.decode(msgspec.json.encode(OrderResponse.from_model(order)))
+        assert payload["id"] == str(order.id)
+        assert payload["user_id"] == str(user.id)
+        assert payload["quantity"] == 2
+        assert payload["created_at"] == order.created_at.isoformat()
+
+
+class TestExportService:
+    @pytest.mark.asyncio
+    async def test_users_ndjson_streams_filtered_rows(self, engine, user_repository: UserRepository, session: AsyncSession):
+        started_at = datetime.now()
+        user = await user_repository.create(UserCreate(username="export_user", email="export@example.com"))
+        await session.commit()
+
+        export_service = ExportService(
+            build_session_factory(engine), batch_size=2
+        )
+
+        chunks = [chunk async for chunk in export_service.users_ndjson(created_from=started_at)]
+        rows = [json.loads(line) for line in b"".join(chunks).splitlines()]
+        assert [row["id"] for row in rows] == [str(user.id)]
+        assert rows[0]["username"] == "export_user"
+
+        chunks = [chunk async for chunk in export_service.users_ndjson(
+            created_from=started_at, created_to=started_at + timedelta(days=1), compress=True
+        )]
+        assert json.loads(gzip.decompress(b"".join(chunks)))["id"] == str(user.id)
+
+
+class TestSlowQueryLog:
+    @pytest.mark.asyncio
+    async def test_logs_caller_types_and_plan_to_rotating_file(self, tables, tmp_path, monkeypatch):
+        # Свой файл вместо slow_queries.log, который подключил движок приложения
+        monkeypatch.setattr(slow_query_log.logger, "handlers", [])
+        monkeypatch.setattr(slow_query_log, "SLOW_QUERY_LOG_MAX_BYTES", 500)
+        log_file = tmp_path / "slow.log"
+        slow_query_log.configure_slow_query_logger(str(log_file))
+
+        engine = build_engine(TEST_DATABASE_URL, instrument=False, echo=False)
+        slow_query_log.install_slow_query_log(engine, threshold_ms=0, explain_sample_rate=1)
+        try:
+            async with build_session_factory(engine)() as session:
+                repository = UserRepository(session)
+                await repository.get_by_filter(1, 1, username="secret_username")
+                for _ in range(5):
+                    await repository.get_by_email("secret@example.com")
+        finally:
+            await engine.dispose()
+            for handler in slow_query_log.logger.handlers:
+                handler.close()
+
+        logged = "".join(path.read_text() for path in tmp_path.glob("slow.log*"))
+        assert "caller=UserRepository.get_by_filter params=" in logged
+        assert "caller=UserRepository.get_by_email params=" in logged
+        assert "'str'" in logged
+        assert "secret_username" not in logged and "secret@example.com" not in logged
+        assert re.search(r"(SCAN|SEARCH) users", logged)
+        assert (tmp_path / "slow.log.1").exists()
+
+
+class TestTracing:
+    @pytest.mark.asyncio
+    async def test_spans_follow_call_chain(self, monkeypatch, tmp_path, user_service: UserService):
+        exporter = tracing.FileSpanExporter(str(tmp_path / "traces.jsonl"))
+        monkeypatch.setattr(tracing, "exporter", exporter)
+        monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 1.0)
+        monkeypatch.setattr(tracing, "TRACING_ENABLED", True)
+
+        with tracing.start_span("request", kind="server") as root:
+            await user_service.get_by_filter(10, 1)
+        exporter.flush()
+
+        line = (tmp_path / "traces.jsonl").read_text().splitlines()[0]
+        spans = json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        by_name = {span["name"]: span for span in spans}
+        assert {span["traceId"] for span in spans} == {root.trace_id}
+        assert by_name["UserService.get_by_filter"]["parentSpanId"] == root.span_id
+        assert by_name["UserRepository.get_by_filter"]["parentSpanId"] == by_name["UserService.get_by_filter"]["spanId"]
+
+    @pytest.mark.asyncio
+    async def test_unsampled_trace_is_not_exported(self, monkeypatch, tmp_path, user_service: UserService):
+        exporter = tracing.FileSpanExporter(str(tmp_path / "traces.jsonl"))
+        monkeypatch.setattr(tracing, "exporter", exporter)
+        monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 0.0)
+
+        with tracing.start_span("request", kind="server"):
+            await user_service.get_by_filter(10, 1)
+        exporter.flush()
+
+        assert not (tmp_path / "traces.jsonl").exists()
+
+
+class TestImportService:
+    @staticmethod
+    async def _chunks(data: bytes, size: int = 7):
+        for i in range(0, len(data), size):
+            yield data[i:i + size]
+
+    @pytest.mark.asyncio
+    async def test_import_products_csv(self, engine, product_repository: ProductRepository):
+        data = (
+            "name,description,price\n"
+            'Import Laptop,"Multi-line\ndescription, with comma",999.99\n'
+            "Import Mouse,,19.5\n"
+            "Import Broken,,not-a-price\n"
+        ).encode()
+        import_service = ImportService(
+            build_session_factory(engine), batch_size=1
+        )
+
+        report = await import_service.import_products(self._chunks(data), "csv")
+
+        assert (report.inserted, report.failed) == (2, 1)
+        assert report.errors[0].line == 5
+        products = await product_repository.get_by_filter(10, 1, name="Import Laptop")
+        assert products[0].description == "Multi-line\ndescription, with comma"
+
+    @pytest.mark.asyncio
+    async def test_import_users_ndjson_reports_duplicates(self, engine, user_repository: UserRepository):
+        data = b"\n".join([
+            b'{"username": "import_a", "email": "import_a@example.com"}',
+            b'{"username": "import_a", "email": "import_b@example.com"}',
+            b'{"username": 42}',
+            b'{"username": "import_c", "email": "import_c@example.com"}',
+        ])
+        import_service = ImportService(build_session_factory(engine))
+
+        report = await import_service.import_users(self._chunks(data), "ndjson")
+
+        assert (report.inserted, report.failed) == (2, 2)
+        assert [error.line for error in report.errors] == [2, 3]
+        assert await user_repository.get_by_email("import_c@example.com") is not None
+
+
+class TestColumnarExportService:
+    @pytest.mark.asyncio
+    async def test_export_partitions_orders_by_date(self, engine, tmp_path, order_service: OrderService,
+                                                   user_service: UserService, address_service: AddressService,
+                                                   product_service: ProductService, session: AsyncSession):
+        import pyarrow.dataset as ds
+
+        user = await user_service.create(UserCreate(username="columnar_user", email="columnar@example.com"))
+        address = await address_service.create(AddressCreate(
+            user_id=user.id, street="1 Main St", city="Moscow", state="MOW", zip_code="101000", country="RU"
+        ))
+        product = await product_service.create(ProductCreate(name="Columnar Product", price=10.0))
+        order = await order_service.create(OrderCreate(
+            user_id=user.id, address_id=address.id, product_id=product.id, quantity=2, total_price=20.0
+        ))
+        await session.commit()
+
+        export_service = ColumnarExportService(
+            build_session_factory(engine), str(tmp_path)
+        )
+        exported = await export_service.export()
+
+        assert exported["orders"] >= 1
+        assert (tmp_path / "orders" / f"created_date={order.created_at.date().isoformat()}" / "part-0.parquet").exists()
+        orders = ds.dataset(tmp_path / "orders", format="parquet", partitioning="hive").to_table().to_pylist()
+        exported_order = next(row for row in orders if row["id"] == str(order.id))
+        assert exported_order["total_price"] == 20.0
+        assert exported_order["created_date"] == order.created_at.date().isoformat()
+        users = ds.dataset(tmp_path / "users", format="parquet").to_table()
+        assert "columnar_user" in users.column("username").to_pylist()
+
+
+class TestRequestCoalescing:
+    @pytest.mark.asyncio
+    async def test_identical_concurrent_reads_share_one_call(self):
+        coalescer = RequestCoalescer("test")
+        calls = 0
+
+        async def load():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return calls
+
+        user_id = uuid4()
+        results = await asyncio.gather(
+            coalescer.run(coalescing_key("GET /users/{user_id}", user_id=str(user_id)), load),
+            coalescer.run(coalescing_key("GET /users/{user_id}", user_id=str(user_id).upper()), load),
+            coalescer.run(coalescing_key("GET /users/{user_id}", user_id=str(uuid4())), load),
+        )
+
+        assert calls == 2
+        assert results[0] == results[1]
+        assert len(coalescer) == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_cancel_shared_read(self):
+        coalescer = RequestCoalescer("test")
+
+        async def load():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        key = coalescing_key("GET /users", count=10, page=1)
+        first = asyncio.ensure_future(coalescer.run(key, load))
+        second = asyncio.ensure_future(coalescer.run(key, load))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        with pytest.raises(ValueError):
+            await second
+
+    @pytest.mark.asyncio
+    async def test_shared_read_survives_cancelled_leader(self, engine, user_repository, session, monkeypatch):
+        monkeypatch.setattr(user_controller, "async_session_factory", build_session_factory(engine))
+        user = await user_repository.create(UserCreate(username="coalesced", email="coalesced@example.com"))
+        await session.commit()
+
+        key = coalescing_key("GET /users/{user_id}", user_id=str(user.id))
+        load = lambda: user_controller.read_users("get_by_id", str(user.id))
+        leader = asyncio.ensure_future(user_controller.user_reads.run(key, load))
+        follower = asyncio.ensure_future(user_controller.user_reads.run(key, load))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        shared_user = await follower
+        assert shared_user.id == user.id
+        assert leader.cancelled()
+
+
+class TestLifespan:
+    @pytest.mark.asyncio
+    async def test_warm_up_database_runs_hot_statements(self, engine, tables):
+        install_query_tracking(engine)
+        with track_queries("warm_up") as tracker:
+            await warm_up_database(engine, connections=2)
+
+        # SELECT 1 и три горячих запроса на каждом соединении
+        assert tracker.count >= 8
+
+    @pytest.mark.asyncio
+    async def test_starts_without_redis(self, tables, monkeypatch, caplog):
+        monkeypatch.setattr(lifespan_module, "REDIS_URL", "redis://127.0.0.1:1/0")
+        monkeypatch.setattr(lifespan_module, "BROKER_ENABLED", False)
+        app = Litestar(route_handlers=[], logging_config=None)
+
+        with caplog.at_level("WARNING", logger="lifespan"):
+            async with lifespan_module.lifespan(app):
+                assert app.state.redis is None
+
+        assert "Redis at redis://127.0.0.1:1/0 is unavailable" in caplog.text
+
+
+class TestServe:
+    def test_pool_per_worker_fits_connection_budget(self):
+        for workers in (1, 3, 8):
+            pool_size, max_overflow = pool_per_worker(workers, max_connections=100, reserved=10)
+            assert pool_size >= 1
+            assert (pool_size + max_overflow) * workers <= 90
+
+
+class TestSettings:
+    def test_profiles_change_defaults(self, monkeypatch):
+        monkeypatch.delenv("DATABASE_URL", raising=False)
+        monkeypatch.delenv("BROKER_ENABLED", raising=False)
+        test_settings = load_settings("test")
+        assert test_settings.database_url.startswith("sqlite")
+        assert not test_settings.broker_enabled
+        assert not test_settings.tracing_enabled
+        assert "connect_args" not in build_engine_options(test_settings)
+
+    def test_environment_overrides_profile(self, monkeypatch):
+        monkeypatch.setenv("DATABASE_URL", "postgresql+asyncpg://user:password@db/app")
+        monkeypatch.setenv("DB_POOL_SIZE", "7")
+        prod_settings = load_settings("prod")
+        options = build_engine_options(prod_settings)
+        assert options["pool_size"] == 7
+        assert options["pool_recycle"] == 1800
+        assert options["pool_pre_ping"]
+        assert options["connect_args"]["prepared_statement_cache_size"] == 100
+        assert options["connect_args"]["server_settings"]["statement_timeout"] == "30000"
+
+    @pytest.mark.asyncio
+    async def test_sqlite_engine_applies_pragmas(self, tmp_path):
+        sqlite_engine = build_engine(f"sqlite:///{tmp_path}/pragmas.db", instrument=False)
+        try:
+            async with sqlite_engine.connect() as conn:
+                busy_timeout = (await conn.exec_driver_sql("PRAGMA busy_timeout")).scalar()
+        finally:
+            await sqlite_engine.dispose()
+        assert sqlite_engine.url.drivername == "sqlite+aiosqlite"
+        assert busy_timeout == 5000
+
+    def test_unknown_profile(self):
+        with pytest.raises(ValueError):
+            load_settings("staging")
+
+
+class TestSqliteHighThroughput:
+    @pytest.mark.asyncio
+    async def test_concurrent_writers_go_through_single_writer(self, tmp_path):
+        config = load_settings("test").model_copy(update={"sqlite_high_throughput": True})
+        reader = build_engine(f"sqlite:///{tmp_path}/wal.db", config, instrument=False)
+        writer = build_writer_engine(reader, config)
+        session_factory = build_session_factory(reader, writer)
+        try:
+            async with reader.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                journal_mode = (await conn.exec_driver_sql("PRAGMA journal_mode")).scalar()
+
+            async def create_user(i: int) -> None:
+                async with session_factory() as s:
+                    await UserRepository(s).get_by_filter(10, 1)
+                    assert s.sync_session.get_bind() is reader.sync_engine
+                    await UserRepository(s).create(UserCreate(username=f"wal_{i}", email=f"wal_{i}@example.com"))
+                    assert s.sync_session.get_bind() is writer.sync_engine
+                    await s.commit()
+                    assert s.sync_session.get_bind() is reader.sync_engine
+
+            await asyncio.gather(*(create_user(i) for i in range(20)))
+
+            async with session_factory() as s:
+                users = await UserRepository(s).get_by_filter(100, 1)
+        finally:
+            await writer.dispose()
+            await reader.dispose()
+
+        assert journal_mode == "wal"
+        assert len(users) == 20
+
+
+class TestPoolSaturation:
+    @pytest.mark.asyncio
+    async def test_timeout_is_counted_and_logged(self, tmp_path, caplog):
+        config = load_settings("test").model_copy(update={"sqlite_high_throughput": True})
+        saturated_engine = build_engine(
+            f"sqlite:///{tmp_path}/pool.db",
+            config,
+            pool_logging_name="saturation_test",
+            pool_size=1,
+            pool_timeout=0.2,
+        )
+        try:
+            async with saturated_engine.connect():
+                with caplog.at_level("WARNING", logger="db_pool"):
+                    with pytest.raises(PoolTimeoutError):
+                        async with saturated_engine.connect():
+                            pass
+        finally:
+            await saturated_engine.dispose()
+
+        labels = {"pool": "saturation_test"}
+        assert REGISTRY.get_sample_value("db_pool_timeouts_total", labels) == 1
+        assert REGISTRY.get_sample_value("db_pool_checkout_wait_seconds_count", labels) >= 2
+        assert "DB pool saturation_test saturated" in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_connect_time_is_not_counted_as_wait(self, tmp_path, caplog):
+        config = load_settings("test").model_copy(update={"sqlite_high_throughput": True})
+        slow_engine = build_engine(f"sqlite:///{tmp_path}/pool.db", config, pool_logging_name="slow_connect_test")
+
+        @event.listens_for(slow_engine.sync_engine, "connect")
+        def _slow_connect(dbapi_connection, connection_record):
+            time.sleep(0.3)
+
+        try:
+            with caplog.at_level("WARNING", logger="db_pool"):
+                async with slow_engine.connect():
+                    pass
+        finally:
+            await slow_engine.dispose()
+
+        labels = {"pool": "slow_connect_test"}
+        assert REGISTRY.get_sample_value("db_pool_checkout_wait_seconds_count", labels) == 1
+        assert REGISTRY.get_sample_value("db_pool_checkout_wait_seconds_sum", labels) < 0.1
+        assert "saturated" not in caplog.text
+
+
+class TestServerTiming:
+    @pytest.mark.asyncio
+    async def test_header_and_log_line(self, http_client, monkeypatch, caplog):
+        monkeypatch.setattr(server_timing, "SERVER_TIMING_ENABLED", True)
+
+        with caplog.at_level(logging.INFO, logger="server_timing"):
+            response = await http_client.get("/users", params={"count": 5})
+
+        assert response.status_code == 200
+        header = response.headers["Server-Timing"]
+        match = re.search(r'db;dur=[\d.]+;desc="(\d+) statements"', header)
+        assert match and int(match.group(1)) > 0
+        assert "total;dur=" in header
+
+        lines = [json.loads(record.getMessage()) for record in caplog.records if record.name == "server_timing"]
+        assert lines[-1]["path"] == "/users"
+        assert lines[-1]["status"] == 200
+        assert lines[-1]["db_statements"] == int(match.group(1))
+
+
+class TestMetrics:
+    @staticmethod
+    def latency_count(route, status, method="GET"):
+        labels = {"method": method, "route": route, "status": status}
+        return REGISTRY.get_sample_value("http_request_duration_seconds_count", labels) or 0
+
+    @pytest.mark.asyncio
+    async def test_labels_by_route_template(self, http_client):
+        before = self.latency_count("/users/{user_id}", "404")
+
+        for _ in range(2):
+            response = await http_client.get(f"/users/{uuid4()}")
+            assert response.status_code == 404
+
+        assert self.latency_count("/users/{user_id}", "404") == before + 2
+        samples = [
+            sample.labels["route"]
+            for metric in REGISTRY.collect() if metric.name == "http_request_duration_seconds"
+            for sample in metric.samples
+        ]
+        assert not any(route.startswith("/users/") and route != "/users/{user_id}" for route in samples)
+
+    @pytest.mark.asyncio
+    async def test_in_flight_gauge(self):
+        def in_flight():
+            return REGISTRY.get_sample_value("http_requests_in_flight", {"method": "PATCH"}) or 0
+
+        seen = []
+
+        async def app(scope, receive, send):
+            seen.append(in_flight())
+            await send({"type": "http.response.start", "status": 204, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        async def send(message):
+            pass
+
+        before = in_flight()
+        await MetricsMiddleware(app)({"type": "http", "method": "PATCH", "path": "/x"}, None, send)
+
+        assert seen == [before + 1]
+        assert in_flight() == before
+        assert self.latency_count("unmatched", "204", method="PATCH") >= 1
+
+    @pytest.mark.asyncio
+    async def test_metrics_endpoint(self):
+        app = Litestar(route_handlers=[MetricsController], logging_config=None)
+        async with AsyncTestClient(app) as client:
+            response = await client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "# TYPE http_request_duration_seconds histogram" in response.text
+        assert "db_pool_checkout_wait_seconds" in response.text
+
+    def test_collect_metrics_sums_worker_files(self, tmp_path, monkeypatch):
+        # Так выглядят mmap-файлы двух воркеров uvicorn в PROMETHEUS_MULTIPROC_DIR
+        key = mmap_key("cache_requests", "cache_requests_total", ["cache", "result"], ["users", "hit"], "")
+        for pid, value in ((101, 3.0), (102, 4.0)):
+            values = MmapedDict(str(tmp_path / f"counter_{pid}.db"))
+            values.write_value(key, value, 0.0)
+            values.close()
+        monkeypatch.setattr(metrics, "PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+
+        output = metrics.collect_metrics().decode()
+
+        assert 'cache_requests_total{cache="users",result="hit"} 7.0' in output
+
+
+class TestRequestDeadline:
+    def test_header_only_shortens_configured_budget(self):
+        assert request_budget_ms(None, default_ms=0) is None
+        assert request_budget_ms(b"250", default_ms=0) == 250
+        assert request_budget_ms(b"250", default_ms=1000) == 250
+        assert request_budget_ms(b"5000", default_ms=1000) == 1000
+        assert request_budget_ms(b"soon", default_ms=1000) == 1000
+
+    @pytest.mark.asyncio
+    async def test_slow_request_gets_504_and_releases_session(self, http_client, monkeypatch):
+        seen_remaining = []
+
+        async def slow_get_by_ids(self, user_ids, fields=None):
+            await self.session.execute(text("SELECT 1"))
+            seen_remaining.append(remaining_ms())
+            await asyncio.sleep(5)
+            return []
+
+        monkeypatch.setattr(UserRepository, "get_by_ids", slow_get_by_ids)
+        used = REGISTRY.get_sample_value("db_session_requests_total", {"result": "used"}) or 0
+
+        started = time.perf_counter()
+        response = await http_client.get(
+            "/users", params={"ids": str(uuid4())}, headers={"X-Request-Deadline": "200"}
+        )
+
+        assert response.status_code == 504
+        assert response.json()["detail"] == "Request deadline exceeded"
+        assert time.perf_counter() - started < 2
+        assert 0 < seen_remaining[0] <= 200
+        # Сессия закрыта: provide_db_session отработал finally после отмены
+        assert REGISTRY.get_sample_value("db_session_requests_total", {"result": "used"}) == used + 1
+
+    def test_statement_timeout_maps_to_504(self):
+        class QueryCanceled(Exception):
+            sqlstate = "57014"
+
+        request = RequestFactory().get("/users")
+        assert query_canceled_handler(request, DBAPIError("SELECT 1", None, QueryCanceled())).status_code == 504
+        assert query_canceled_handler(request, DBAPIError("SELECT 1", None, Exception())).status_code == 500
+
+    @pytest.mark.asyncio
+    async def test_fast_request_is_not_affected(self, http_client):
+        response = await http_client.get("/users", headers={"X-Request-Deadline": "5000"})
+
+        assert response.status_code == 200
+        assert remaining_ms() is None
+
+
+class TestPublisher:
+    class FakeExchange:
+        def __init__(self, channel):
+            self.channel = channel
+
+        async def publish(self, message, routing_key, mandatory):
+            self.channel.in_flight += 1
+            self.channel.peak_in_flight = max(self.channel.peak_in_flight, self.channel.in_flight)
+            # Подтверждение приходит после того, как ушёл весь пакет
+            await asyncio.sleep(0)
+            self.channel.in_flight -= 1
+            self.channel.published.append((routing_key, json.loads(message.body)))
+
+    class FakeChannel:
+        def __init__(self):
+            self.published = []
+            self.in_flight = 0
+            self.peak_in_flight = 0
+            self.default_exchange = TestPublisher.FakeExchange(self)
+
+        async def close(self):
+            pass
+
+    class FakeBroker:
+        def __init__(self):
+            self.channels = []
+
+        async def connect(self):
+            return self
+
+        async def channel(self, publisher_confirms):
+            assert publisher_confirms
+            channel = TestPublisher.FakeChannel()
+            self.channels.append(channel)
+            return channel
+
+    @pytest.mark.asyncio
+    async def test_publish_many_batches_over_channel_pool(self):
+        broker = self.FakeBroker()
+        publisher = Publisher(broker, channels=2, batch_size=10)
+        await publisher.start()
+        try:
+            sent = await publisher.publish_many("order", [{"n": n} for n in range(45)])
+        finally:
+            await publisher.close()
+
+        assert sent == 45
+        assert len(broker.channels) == 2
+        published = [message for channel in broker.channels for _, message in channel.published]
+        assert sorted(message["n"] for message in published) == list(range(45))
+        # Подтверждения ждутся пачкой, а не по одному сообщению
+        assert max(channel.peak_in_flight for channel in broker.channels) == 10
+
+    @pytest.mark.asyncio
+    async def test_requires_start(self):
+        with pytest.raises(RuntimeError):
+            await Publisher(self.FakeBroker()).publish("order", {})
+
+
+class TestOutbox:
+    class RecordingPublisher:
+        def __init__(self, fail: bool = False):
+            self.fail = fail
+            self.published = []
+
+        async def publish_many(self, queue, messages):
+            if self.fail:
+                raise ConnectionError("broker is down")
+            self.published.extend((queue, message) for message in messages)
+            return len(messages)
+
+    @staticmethod
+    async def create_order(session: AsyncSession, name: str):
+        user = await UserService(UserRepository(session)).create(
+            UserCreate(username=f"{name}_user", email=f"{name}@example.com")
+        )
+        address = await AddressService(AddressRepository(session), UserRepository(session)).create(AddressCreate(
+            user_id=user.id, street="Outbox St", city="City", state="ST", zip_code="1", country="RU"
+        ))
+        product = await ProductService(ProductRepository(session)).create(ProductCreate(name=f"{name}_product", price=3.0))
+        order = await OrderService(
+            OrderRepository(session), UserRepository(session), ProductRepository(session), AddressRepository(session)
+        ).create(OrderCreate(user_id=user.id, address_id=address.id, product_id=product.id, quantity=2))
+        return product, order
+
+    @staticmethod
+    async def events_for(session: AsyncSession, entity_id) -> list[OutboxEvent]:
+        result = await session.execute(select(OutboxEvent).execution_options(populate_existing=True))
+        return [event for event in result.scalars() if event.payload["id"] == str(entity_id)]
+
+    @pytest.mark.asyncio
+    async def test_event_is_committed_with_order(self, session: AsyncSession):
+        product, order = await self.create_order(session, "outbox_commit")
+
+        [order_event] = await self.events_for(session, order.id)
+        assert order_event.topic == "order"
+        assert order_event.payload["quantity"] == 2
+        assert order_event.sent_at is None
+        [product_event] = await self.events_for(session, product.id)
+        assert product_event.topic == "product"
+
+    @pytest.mark.asyncio
+    async def test_relay_publishes_and_marks_sent(self, engine, session: AsyncSession):
+        _, order = await self.create_order(session, "outbox_relay")
+        relay = OutboxRelay(build_session_factory(engine), self.RecordingPublisher(fail=True), batch_size=1000)
+
+        with pytest.raises(ConnectionError):
+            await relay.relay_once()
+        [event] = await self.events_for(session, order.id)
+        assert event.sent_at is None
+
+        relay.publisher = self.RecordingPublisher()
+        assert await relay.relay_once() > 0
+        assert ("order", event.payload) in relay.publisher.published
+        [event] = await self.events_for(session, order.id)
+        assert event.sent_at is not None
+
+        assert await relay.relay_once() == 0
+
+
+class TestOrderBatchConsumer:
+    @pytest.mark.asyncio
+    async def test_flushes_by_size_and_by_time(self):
+        batches = []
+
+        async def flush(items):
+            batches.append(items)
+
+        batcher = MessageBatcher(flush, max_size=3, max_wait_ms=20)
+        await asyncio.gather(*(batcher.submit(n) for n in range(5)))
+
+        assert batches == [[0, 1, 2], [3, 4]]
+
+    @pytest.mark.asyncio
+    async def test_flush_error_reaches_every_message_of_the_batch(self):
+        async def flush(items):
+            raise ConnectionError("database is down")
+
+        batcher = MessageBatcher(flush, max_size=2, max_wait_ms=1000)
+        results = await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+        assert [type(result) for result in results] == [ConnectionError, ConnectionError]
+
+    @pytest.mark.asyncio
+    async def test_drain_flushes_partial_batch(self):
+        batches = []
+
+        async def flush(items):
+            batches.append(items)
+
+        batcher = MessageBatcher(flush, max_size=100, max_wait_ms=60000)
+        pending = asyncio.create_task(batcher.submit("order"))
+        await asyncio.sleep(0)
+        await batcher.drain()
+        await pending
+
+        assert batches == [["order"]]
+
+    @pytest.mark.asyncio
+    async def test_records_reports_once_per_order_and_day(self, session: AsyncSession):
+        _, order = await TestOutbox.create_order(session, "batch_report")
+        message = msgspec.to_builtins(OrderResponse.from_model(order))
+        report_service = ReportService(ReportRepository(session))
+
+        assert await report_service.record_orders([message, message]) == 1
+        # Повторная доставка той же пачки
+        assert await report_service.record_orders([message]) == 0
+
+        result = await session.execute(select(Report).where(Report.order_id == order.id))
+        [report] = result.scalars().all()
+        assert report.count_product == order.quantity
+        assert report.report_at == datetime.combine(order.created_at.date(), datetime.min.time())
+
+
+class TestLazySession:
+    @pytest.mark.asyncio
+    async def test_counts_requests_that_never_touch_db(self, engine, tables, monkeypatch):
+        monkeypatch.setattr(dependencies, "async_session_factory", build_session_factory(engine))
+
+        def sample(result):
+            return REGISTRY.get_sample_value("db_session_requests_total", {"result": result}) or 0
+
+        unused, used = sample("unused"), sample("used")
+
+        provider = dependencies.provide_db_session()
+        try:
+            await provider.__anext__()
+        finally:
+            await provider.aclose()
+
+        provider = dependencies.provide_db_session()
+        try:
+            db_session = await provider.__anext__()
+            await UserRepository(db_session).get_by_filter(1, 1)
+        finally:
+            await provider.aclose()
+
+        assert sample("unused") == unused + 1
+        assert sample("used") == used + 1
+
+
 class TestIntegration:
     @pytest.mark.asyncio
     async def test_full_user_workflow(
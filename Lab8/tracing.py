@@ -0,0 +1,174 @@
+import atexit
+import functools
+import inspect
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+import msgspec
+
+from settings import settings
+
+TRACING_ENABLED = settings.tracing_enabled
+TRACE_SAMPLE_RATE = settings.trace_sample_rate
+TRACE_EXPORT_FILE = settings.trace_export_file
+TRACE_EXPORT_BATCH_SIZE = settings.trace_export_batch_size
+SERVICE_NAME = settings.service_name
+
+# Значения SpanKind из OTLP
+SPAN_KINDS = {"internal": 1, "server": 2, "client": 3, "producer": 4, "consumer": 5}
+
+
+@dataclass
+class Span:
+    trace_id: str
+    span_id: str
+    parent_span_id: Optional[str]
+    name: str
+    kind: str
+    sampled: bool
+    start_ns: int = 0
+    end_ns: int = 0
+    error: Optional[str] = None
+    attributes: dict = field(default_factory=dict)
+
+    def set_attribute(self, key: str, value) -> None:
+        if self.sampled:
+            self.attributes[key] = value
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": SPAN_KINDS.get(self.kind, 1),
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                {"key": key, "value": {"stringValue": str(value)}}
+                for key, value in self.attributes.items()
+            ],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+# Пишет батчи в формате OTLP/JSON построчно: такой файл читает otlpjsonfile-ресивер
+# OpenTelemetry Collector, а для флейм-графа достаточно start/end и parentSpanId
+class FileSpanExporter:
+    def __init__(self, path: str = TRACE_EXPORT_FILE, batch_size: int = TRACE_EXPORT_BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self._spans: list[dict] = []
+        self._lock = threading.Lock()
+        self._encoder = msgspec.json.Encoder()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span.to_otlp())
+            if len(self._spans) < self.batch_size:
+                return
+            spans, self._spans = self._spans, []
+        self._write(spans)
+
+    def flush(self) -> None:
+        with self._lock:
+            spans, self._spans = self._spans, []
+        if spans:
+            self._write(spans)
+
+    def _write(self, spans: list[dict]) -> None:
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+                "scopeSpans": [{"scope": {"name": "tracing"}, "spans": spans}],
+            }]
+        }
+        with open(self.path, "ab") as file:
+            file.write(self._encoder.encode(payload) + b"\n")
+
+
+exporter = FileSpanExporter()
+atexit.register(exporter.flush)
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def start_span(name: str, kind: str = "internal", **attributes) -> Iterator[Span]:
+    parent = _current_span.get()
+    if parent is None:
+        # Решение о сэмплировании принимается один раз на корневом span-е
+        span = Span(
+            trace_id=random.getrandbits(128).to_bytes(16, "big").hex(),
+            span_id=random.getrandbits(64).to_bytes(8, "big").hex(),
+            parent_span_id=None,
+            name=name,
+            kind=kind,
+            sampled=TRACING_ENABLED and random.random() < TRACE_SAMPLE_RATE,
+        )
+    else:
+        span = Span(
+            trace_id=parent.trace_id,
+            span_id=random.getrandbits(64).to_bytes(8, "big").hex(),
+            parent_span_id=parent.span_id,
+            name=name,
+            kind=kind,
+            sampled=parent.sampled,
+        )
+
+    token = _current_span.set(span)
+    if span.sampled:
+        span.attributes.update(attributes)
+        span.start_ns = time.time_ns()
+    try:
+        yield span
+    except BaseException as e:
+        span.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        if span.sampled:
+            span.end_ns = time.time_ns()
+            exporter.export(span)
+
+
+def traced(name: Optional[str] = None, kind: str = "internal"):
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with start_span(span_name, kind):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with start_span(span_name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def trace_methods(kind: str = "internal"):
+    # Оборачивает публичные async-методы класса (сервисы, репозитории)
+    def decorator(cls):
+        for attr, value in list(vars(cls).items()):
+            if not attr.startswith("_") and inspect.iscoroutinefunction(value):
+                setattr(cls, attr, traced(f"{cls.__name__}.{attr}", kind)(value))
+        return cls
+
+    return decorator